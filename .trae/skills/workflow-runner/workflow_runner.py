@@ -5,7 +5,11 @@ Workflow Runner v2.0 - 工作流执行器
 🆕 支持蜂群模式并行执行
 """
 
+import base64
+import functools
+import importlib.util
 import json
+import re
 import subprocess
 import sys
 import os
@@ -22,6 +26,19 @@ GLOBAL_WORKFLOW_DIR = Path("C:/Users/Administrator/.trae-cn/workflows")
 PROJECT_WORKFLOW_DIR = Path(".trae/workflows")
 SWARM_DIR = Path(".trae/swarm")
 
+# 触发词：工作流名 -> 关键词（按顺序优先匹配靠前的工作流）
+WORKFLOW_TRIGGERS = {
+    "git-commit-summary": ["提交摘要", "git summary", "周报", "commit", "提交记录"],
+    "project-stats": ["统计项目", "project stats", "代码统计", "统计", "代码量"],
+    "swarm-execution": ["蜂群", "并行执行", "swarm", "/swarm", "启动蜂群"]
+}
+_TRIGGER_KEYWORDS = {kw.lower(): wf for wf, keywords in WORKFLOW_TRIGGERS.items() for kw in keywords}
+# 前瞻匹配，一次扫描即可找出全部（含相互重叠的）关键词；匹配前先把输入转为小写
+_TRIGGER_RE = re.compile('(?=(' + '|'.join(map(re.escape, _TRIGGER_KEYWORDS)) + '))')
+
+# 已在进程内加载的 workflow_manager 模块：目录 -> 模块（加载失败为 None）
+_MANAGER_MODULES: Dict[str, Any] = {}
+
 
 class TaskStatus(Enum):
     PENDING = "pending"
@@ -183,18 +200,40 @@ class SwarmOrchestrator:
         }
 
 
-def get_workflow_dirs() -> list[Path]:
-    """获取所有工作流目录（项目级优先）"""
+@functools.lru_cache(maxsize=8)
+def _workflow_dirs(cwd: str) -> tuple:
+    """按当前目录缓存存在的工作流目录"""
     dirs = []
     
-    project_dir = Path.cwd() / PROJECT_WORKFLOW_DIR
+    project_dir = Path(cwd) / PROJECT_WORKFLOW_DIR
     if project_dir.exists():
         dirs.append(project_dir)
     
     if GLOBAL_WORKFLOW_DIR.exists():
         dirs.append(GLOBAL_WORKFLOW_DIR)
     
-    return dirs
+    return tuple(dirs)
+
+
+@functools.lru_cache(maxsize=32)
+def _workflow_files(dir_path: Path) -> frozenset:
+    """目录下的 .yaml 文件名（一次 scandir，按目录缓存）"""
+    try:
+        with os.scandir(dir_path) as it:
+            return frozenset(entry.name for entry in it if entry.name.endswith('.yaml'))
+    except OSError:
+        return frozenset()
+
+
+def _clear_caches():
+    """清除目录与工作流文件缓存（缓存在进程内一直有效，工作流增删后显式调用，如 --refresh）"""
+    _workflow_dirs.cache_clear()
+    _workflow_files.cache_clear()
+
+
+def get_workflow_dirs() -> list[Path]:
+    """获取所有工作流目录（项目级优先）"""
+    return list(_workflow_dirs(str(Path.cwd())))
 
 
 def find_workflow_manager() -> Path | None:
@@ -206,6 +245,27 @@ def find_workflow_manager() -> Path | None:
     return None
 
 
+def _load_manager_module(dir_path: Path):
+    """在当前进程中加载目录下的 workflow_manager.py（按目录缓存），加载失败时返回 None"""
+    key = str(dir_path)
+    if key in _MANAGER_MODULES:
+        return _MANAGER_MODULES[key]
+    
+    # 全局与项目目录下的模块同名，用各自独立的模块名加载
+    module_name = f"_workflow_manager_{len(_MANAGER_MODULES)}"
+    module = None
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, dir_path / "workflow_manager.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(module_name, None)
+        module = None
+    _MANAGER_MODULES[key] = module
+    return module
+
+
 def list_workflows() -> list:
     """列出所有可用工作流（合并全局和项目）"""
     all_workflows = []
@@ -213,22 +273,26 @@ def list_workflows() -> list:
     
     for dir_path in get_workflow_dirs():
         try:
-            result = subprocess.run(
-                [sys.executable, str(dir_path / "workflow_manager.py"), "list"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                workflows = json.loads(result.stdout)
-                for wf in workflows:
-                    if isinstance(wf, dict) and "name" in wf:
-                        if wf["name"] not in seen_names:
-                            seen_names.add(wf["name"])
-                            wf["source"] = "project" if dir_path == Path.cwd() / PROJECT_WORKFLOW_DIR else "global"
-                            all_workflows.append(wf)
-                    elif isinstance(wf, dict) and "error" not in wf:
+            module = _load_manager_module(dir_path)
+            if module is not None:
+                # 进程内直接调用，省去子进程启动和 JSON 往返
+                workflows = module.WorkflowManager().list_workflows()
+            else:
+                result = subprocess.run(
+                    [sys.executable, str(dir_path / "workflow_manager.py"), "list"],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+                workflows = json.loads(result.stdout) if result.returncode == 0 else []
+            for wf in workflows:
+                if isinstance(wf, dict) and "name" in wf:
+                    if wf["name"] not in seen_names:
+                        seen_names.add(wf["name"])
+                        wf["source"] = "project" if dir_path == Path.cwd() / PROJECT_WORKFLOW_DIR else "global"
                         all_workflows.append(wf)
+                elif isinstance(wf, dict) and "error" not in wf:
+                    all_workflows.append(wf)
         except Exception as e:
             all_workflows.append({"error": f"{dir_path}: {str(e)}"})
     
@@ -237,9 +301,9 @@ def list_workflows() -> list:
 
 def find_workflow_location(workflow_name: str) -> Path | None:
     """查找工作流所在的目录（项目级优先）"""
+    file_name = f"{workflow_name}.yaml"
     for dir_path in get_workflow_dirs():
-        workflow_file = dir_path / f"{workflow_name}.yaml"
-        if workflow_file.exists():
+        if file_name in _workflow_files(dir_path):
             return dir_path
     return None
 
@@ -251,12 +315,18 @@ def run_workflow(workflow_name: str, context: dict = None) -> dict:
     if not workflow_dir:
         return {"status": "error", "message": f"工作流 '{workflow_name}' 未找到"}
     
+    # 执行放在子进程中：可以按超时终止卡住的步骤，步骤输出也不会混入本进程的 stdout
     try:
         cmd = [sys.executable, str(workflow_dir / "workflow_manager.py"), "run", workflow_name]
         
-        if context:
+        if context and all(isinstance(value, str) for value in context.values()):
+            # 纯字符串变量继续用 --var，兼容各项目中旧版本的 workflow_manager.py
             for key, value in context.items():
                 cmd.extend(["--var", f"{key}={value}"])
+        elif context:
+            # 含数值、列表等类型时整体编码为一个参数，保留 JSON 类型
+            payload = json.dumps(context, ensure_ascii=False, default=str).encode('utf-8')
+            cmd.extend(["--context-b64", base64.b64encode(payload).decode('ascii')])
         
         result = subprocess.run(
             cmd,
@@ -309,18 +379,10 @@ def run_swarm_workflow(task_description: str, max_workers: int = 3) -> dict:
 
 def find_workflow_by_trigger(text: str) -> str | None:
     """根据用户输入查找匹配的工作流"""
-    triggers = {
-        "git-commit-summary": ["提交摘要", "git summary", "周报", "commit", "提交记录"],
-        "project-stats": ["统计项目", "project stats", "代码统计", "统计", "代码量"],
-        "swarm-execution": ["蜂群", "并行执行", "swarm", "/swarm", "启动蜂群"]
-    }
-    
-    text_lower = text.lower()
-    for workflow, keywords in triggers.items():
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                if find_workflow_location(workflow):
-                    return workflow
+    matched = {_TRIGGER_KEYWORDS[m.group(1)] for m in _TRIGGER_RE.finditer(text.lower())}
+    for workflow in WORKFLOW_TRIGGERS:
+        if workflow in matched and find_workflow_location(workflow):
+            return workflow
     return None
 
 
@@ -333,8 +395,11 @@ if __name__ == "__main__":
     parser.add_argument("--text", help="用户输入文本（用于检测）")
     parser.add_argument("--task", help="任务描述（用于蜂群模式）")
     parser.add_argument("--workers", type=int, default=3, help="最大并行Worker数")
+    parser.add_argument("--refresh", action="store_true", help="重新扫描工作流目录（清除缓存）")
     
     args = parser.parse_args()
+    if args.refresh:
+        _clear_caches()
     
     if args.action == "list":
         workflows = list_workflows()
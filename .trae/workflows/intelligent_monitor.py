@@ -5,22 +5,58 @@
 """
 
 import os
+import re
 import sys
 import json
 import time
 import subprocess
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 
-# 尝试导入watchdog，如果没有则使用轮询模式
+# 守护模式依赖watchdog的事件通知（Linux下为inotify），单次检查不需要
 try:
     from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
     from watchdog.events import FileSystemEventHandler, FileModifiedEvent
     WATCHDOG_AVAILABLE = True
 except ImportError:
     WATCHDOG_AVAILABLE = False
-    print("⚠️ watchdog未安装，使用轮询模式 (pip install watchdog)")
+
+# 可选：规则关键词较多时用 Aho-Corasick 自动机一次扫描完成分类
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 需要关注的文件（后缀 / 文件名）以及遍历时跳过的目录
+WATCH_SUFFIXES = ('.py', '.js', '.md')
+WATCH_NAMES = frozenset({'requirements.txt', 'package.json'})
+IGNORED_DIRS = frozenset({'.git', '__pycache__', 'node_modules', '.trae', 'venv', '.venv'})
+# 项目类型标记文件（按检测优先级排列）
+PROJECT_MARKERS = {
+    'requirements.txt': 'python',
+    'package.json': 'nodejs',
+    'Cargo.toml': 'rust',
+    'go.mod': 'go',
+}
+# 定期安全检查间隔（秒）
+SECURITY_CHECK_INTERVAL = 86400
+PRIORITIES = ('high', 'medium', 'low')
+# 推荐结果输出
+_TTY = sys.stdout is not None and sys.stdout.isatty()
+_SEPARATOR = "=" * 60
+# 文件名关键词 -> 规则标签（api: 文档同步检查, coverage: 覆盖率报告）
+CLASSIFY_KEYWORDS = {
+    'api': 'api',
+    'route': 'api',
+    'test': 'coverage',
+}
+# 未安装 ahocorasick 时的回退：单个正则，前瞻匹配以保留重叠的关键词
+_CLASSIFY_RE = re.compile('(?=(' + '|'.join(map(re.escape, CLASSIFY_KEYWORDS)) + '))')
+# 事件路径过滤（兼容 / 与 \\ 分隔符）
+_IGNORE_RE = re.compile(r'\.pyc$|__pycache__|node_modules|(?:^|[\\/])(?:\.git|\.trae|\.?venv)(?:[\\/]|$)')
 
 
 class WorkflowRecommender:
@@ -28,48 +64,132 @@ class WorkflowRecommender:
     
     def __init__(self, project_path: str):
         self.project_path = Path(project_path)
+        # 热路径上直接使用字符串路径，避免反复构造 Path 对象
+        self._root = str(self.project_path)
         self.recommendations: List[Dict] = []
-        self.last_check = {}
+        self.last_check: Dict[str, float] = {}
+        self.project_type: Optional[str] = None
+        self.refresh_project_type()
+        
+        self._matcher = None
+        if AHOCORASICK_AVAILABLE:
+            self._matcher = ahocorasick.Automaton()
+            for keyword, tag in CLASSIFY_KEYWORDS.items():
+                self._matcher.add_word(keyword, tag)
+            self._matcher.make_automaton()
+        
+        # 下一次定期安全检查的时间戳，只在初始化时读取一次标记文件
+        self._trae_dir = os.path.join(self._root, '.trae')
+        self._security_check_path = os.path.join(self._trae_dir, '.last_security_check')
+        try:
+            self._next_security_check = os.stat(self._security_check_path).st_mtime + SECURITY_CHECK_INTERVAL
+        except OSError:
+            self._next_security_check = 0.0
+    
+    def _mark_security_check(self):
+        """更新安全检查标记文件的 mtime（文件已存在时只需一次 utime 调用）"""
+        try:
+            os.utime(self._security_check_path, None)
+        except FileNotFoundError:
+            os.makedirs(self._trae_dir, exist_ok=True)
+            open(self._security_check_path, 'w').close()
+    
+    def _classify(self, name: str) -> Set[str]:
+        """单次扫描文件名（小写），返回命中的规则标签"""
+        if self._matcher is not None:
+            return {tag for _, tag in self._matcher.iter(name)}
+        return {CLASSIFY_KEYWORDS[m.group(1)] for m in _CLASSIFY_RE.finditer(name)}
+    
+    def refresh_project_type(self):
+        """检测项目类型（守护进程运行期间基本不变，只在标记文件变化时重新检测）"""
+        for marker, project_type in PROJECT_MARKERS.items():
+            if os.path.exists(os.path.join(self._root, marker)):
+                self.project_type = project_type
+                return
+        self.project_type = None
+    
+    def _iter_watched_files(self):
+        """单次 scandir 遍历项目，产出需要关注的文件条目
         
+        忽略的目录在入栈前就被剪掉，不会进入 .git、node_modules、venv 等目录。
+        不跟随符号链接：链接到目录的条目不会被递归（避免链接环），
+        链接到文件的条目也不计入变更检测。
+        """
+        stack = [self._root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if name not in IGNORED_DIRS:
+                                stack.append(entry.path)
+                        elif (name.endswith(WATCH_SUFFIXES) or name in WATCH_NAMES) \
+                                and entry.is_file(follow_symlinks=False):
+                            # 类型来自目录项自带的 d_type，不产生额外 stat
+                            yield entry
+            except OSError:
+                continue
+        
+    def _iter_file_mtimes(self):
+        """产出 (相对路径, 修改时间)，相对路径经 intern 以便在多次扫描间复用"""
+        # scandir 产出的路径都以项目根目录为前缀，直接切片得到相对路径
+        prefix_len = len(os.path.join(self._root, ''))
+        for entry in self._iter_watched_files():
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            yield sys.intern(entry.path[prefix_len:]), mtime
+    
     def analyze_context(self) -> Dict:
-        """分析项目上下文"""
-        context = {
-            'files_changed': [],
+        """分析项目上下文（扫描整个项目查找变更文件）"""
+        previous = self.last_check
+        current: Dict[str, float] = {}
+        files_changed = []
+        for rel_path, mtime in self._iter_file_mtimes():
+            current[rel_path] = mtime
+            if previous.get(rel_path) != mtime:
+                files_changed.append(rel_path)
+        
+        # 用本次扫描结果整体替换，已删除文件的记录随之释放
+        self.last_check = current
+        return self.build_context(files_changed)
+    
+    def build_context(self, files_changed: List[str]) -> Dict:
+        """根据已知的变更文件构建上下文，不扫描文件树"""
+        if any(os.path.basename(f) in PROJECT_MARKERS for f in files_changed):
+            self.refresh_project_type()
+        
+        return {
+            'files_changed': list(files_changed),
             'git_status': {},
-            'project_type': None,
+            'project_type': self.project_type,
             'issues': [],
             'test_coverage': None,
         }
-        
-        # 检测项目类型
-        if (self.project_path / 'requirements.txt').exists():
-            context['project_type'] = 'python'
-        elif (self.project_path / 'package.json').exists():
-            context['project_type'] = 'nodejs'
-        elif (self.project_path / 'Cargo.toml').exists():
-            context['project_type'] = 'rust'
-        elif (self.project_path / 'go.mod').exists():
-            context['project_type'] = 'go'
-            
-        # 检测文件变更
-        for pattern in ['*.py', '*.js', '*.md', 'requirements.txt', 'package.json']:
-            files = list(self.project_path.rglob(pattern))
-            for f in files:
-                if f.is_file():
-                    mtime = f.stat().st_mtime
-                    if pattern not in self.last_check or mtime > self.last_check.get(pattern, 0):
-                        context['files_changed'].append(str(f.relative_to(self.project_path)))
-                        self.last_check[pattern] = mtime
-        
-        return context
     
-    def recommend_workflows(self, context: Dict) -> List[Dict]:
-        """根据上下文推荐工作流"""
-        recommendations = []
+    def recommend_workflows(self, context: Dict) -> Dict[str, List[Dict]]:
+        """根据上下文推荐工作流，结果在规则判定时直接按优先级分桶"""
+        recommendations: Dict[str, List[Dict]] = {p: [] for p in PRIORITIES}
+        
+        # 单次遍历变更文件，完成规则1-4所需的分类
+        deps_changed = False
+        api_files, test_files, doc_files = [], [], []
+        for f in context['files_changed']:
+            if 'requirements.txt' in f or 'package.json' in f:
+                deps_changed = True
+            tags = self._classify(f.lower())
+            if 'api' in tags:
+                api_files.append(f)
+            if 'coverage' in tags:
+                test_files.append(f)
+            if f.endswith(('.md', '.rst')):
+                doc_files.append(f)
         
         # 规则1：依赖文件变更
-        if any('requirements.txt' in f or 'package.json' in f for f in context['files_changed']):
-            recommendations.append({
+        if deps_changed:
+            recommendations['high'].append({
                 'workflow': 'dependency-auto-update',
                 'reason': '检测到依赖文件变更',
                 'priority': 'high',
@@ -78,9 +198,8 @@ class WorkflowRecommender:
             })
         
         # 规则2：API代码变更
-        api_files = [f for f in context['files_changed'] if 'api' in f.lower() or 'route' in f.lower()]
         if api_files:
-            recommendations.append({
+            recommendations['medium'].append({
                 'workflow': 'doc-sync-check',
                 'reason': f'检测到API代码变更: {", ".join(api_files[:2])}',
                 'priority': 'medium',
@@ -89,9 +208,8 @@ class WorkflowRecommender:
             })
         
         # 规则3：测试文件变更
-        test_files = [f for f in context['files_changed'] if 'test' in f.lower()]
         if test_files:
-            recommendations.append({
+            recommendations['medium'].append({
                 'workflow': 'code-coverage-report',
                 'reason': f'检测到测试代码变更: {", ".join(test_files[:2])}',
                 'priority': 'medium',
@@ -100,9 +218,8 @@ class WorkflowRecommender:
             })
         
         # 规则4：README或文档变更
-        doc_files = [f for f in context['files_changed'] if f.endswith('.md') or f.endswith('.rst')]
         if doc_files:
-            recommendations.append({
+            recommendations['low'].append({
                 'workflow': 'create-readme',
                 'reason': '检测到文档变更',
                 'priority': 'low',
@@ -111,90 +228,135 @@ class WorkflowRecommender:
             })
         
         # 规则5：定期安全检查 (每天一次)
-        security_check_file = self.project_path / '.trae' / '.last_security_check'
-        if not security_check_file.exists() or \
-           (datetime.now() - datetime.fromtimestamp(security_check_file.stat().st_mtime)).days >= 1:
-            recommendations.append({
+        now = time.time()
+        if now >= self._next_security_check:
+            recommendations['high'].append({
                 'workflow': 'security-scan-local',
                 'reason': '超过24小时未进行安全检查',
                 'priority': 'high',
                 'auto_run': True,
                 'action': '自动运行安全扫描'
             })
-            security_check_file.touch()
+            self._mark_security_check()
+            self._next_security_check = now + SECURITY_CHECK_INTERVAL
         
         return recommendations
     
-    def display_recommendations(self, recommendations: List[Dict]):
-        """显示推荐结果"""
-        if not recommendations:
+    def display_recommendations(self, recommendations: Dict[str, List[Dict]]):
+        """显示推荐结果（非终端输出时只写一行JSON，便于日志收集）"""
+        if not any(recommendations.values()):
             return
         
-        print("\n" + "="*60)
-        print("🤖 智能工作流推荐")
-        print("="*60)
-        
-        # 按优先级分组
-        high_priority = [r for r in recommendations if r['priority'] == 'high']
-        medium_priority = [r for r in recommendations if r['priority'] == 'medium']
-        low_priority = [r for r in recommendations if r['priority'] == 'low']
-        
-        if high_priority:
-            print("\n🔴 高优先级 (建议立即处理):")
-            for i, rec in enumerate(high_priority, 1):
-                print(f"\n  {i}. [{rec['workflow']}]")
-                print(f"     原因: {rec['reason']}")
-                print(f"     操作: {rec['action']}")
+        if not _TTY:
+            print(json.dumps({'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                              'recommendations': recommendations}, ensure_ascii=False))
+            return
+        
+        parts = ["\n" + _SEPARATOR, "🤖 智能工作流推荐", _SEPARATOR]
+        
+        if recommendations['high']:
+            parts.append("\n🔴 高优先级 (建议立即处理):")
+            for i, rec in enumerate(recommendations['high'], 1):
+                parts.append(f"\n  {i}. [{rec['workflow']}]")
+                parts.append(f"     原因: {rec['reason']}")
+                parts.append(f"     操作: {rec['action']}")
                 if rec['auto_run']:
-                    print(f"     ⚡ 将自动执行")
+                    parts.append("     ⚡ 将自动执行")
                 else:
-                    print(f"     💡 运行: workflow run {rec['workflow']}")
-        
-        if medium_priority:
-            print("\n🟡 中优先级 (建议今天处理):")
-            for i, rec in enumerate(medium_priority, 1):
-                print(f"\n  {i}. [{rec['workflow']}]")
-                print(f"     原因: {rec['reason']}")
-        
-        if low_priority:
-            print("\n🟢 低优先级 (可选):")
-            for i, rec in enumerate(low_priority, 1):
-                print(f"\n  {i}. [{rec['workflow']}]")
-                print(f"     原因: {rec['reason']}")
-        
-        print("\n" + "="*60)
-        print("💡 提示: 说 '帮我看看项目' 或 '智能工作流' 可随时获取推荐")
-        print("="*60 + "\n")
+                    parts.append(f"     💡 运行: workflow run {rec['workflow']}")
+        
+        if recommendations['medium']:
+            parts.append("\n🟡 中优先级 (建议今天处理):")
+            for i, rec in enumerate(recommendations['medium'], 1):
+                parts.append(f"\n  {i}. [{rec['workflow']}]")
+                parts.append(f"     原因: {rec['reason']}")
+        
+        if recommendations['low']:
+            parts.append("\n🟢 低优先级 (可选):")
+            for i, rec in enumerate(recommendations['low'], 1):
+                parts.append(f"\n  {i}. [{rec['workflow']}]")
+                parts.append(f"     原因: {rec['reason']}")
+        
+        parts.append("\n" + _SEPARATOR)
+        parts.append("💡 提示: 说 '帮我看看项目' 或 '智能工作流' 可随时获取推荐")
+        parts.append(_SEPARATOR + "\n")
+        print("\n".join(parts))
 
 
 class IntelligentFileHandler(FileSystemEventHandler if WATCHDOG_AVAILABLE else object):
-    """文件变更处理器"""
+    """文件变更处理器
+    
+    去抖而非节流：一批变更的第一个事件立即触发推荐，后续事件合并，
+    静默 min_quiet 秒或距批次开始超过 max_batch 秒（先到者为准）时再统一推荐一次。
+    """
     
-    def __init__(self, recommender: WorkflowRecommender):
+    def __init__(self, recommender: WorkflowRecommender, min_quiet: float = 0.2, max_batch: float = 2.0):
         self.recommender = recommender
-        self.last_recommendation_time = 0
-        self.cooldown = 30  # 30秒冷却时间
+        self.min_quiet = min_quiet
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._batch_start: Optional[float] = None
+        self._pending = False
+        self.changed: Set[str] = set()
         
     def on_modified(self, event):
         if event.is_directory:
             return
         
         # 忽略特定文件
-        ignored_patterns = ['.pyc', '__pycache__', '.git', '.trae', 'node_modules']
-        if any(pattern in str(event.src_path) for pattern in ignored_patterns):
+        src_path = event.src_path
+        if _IGNORE_RE.search(src_path):
             return
         
-        current_time = time.time()
-        if current_time - self.last_recommendation_time < self.cooldown:
+        # 只关注与推荐规则相关的文件，直接记录事件给出的路径
+        name = os.path.basename(src_path)
+        if not (name.endswith(WATCH_SUFFIXES) or name in WATCH_NAMES):
             return
         
-        self.last_recommendation_time = current_time
+        now = time.monotonic()
+        with self._lock:
+            self.changed.add(os.path.relpath(src_path, self.recommender._root))
+            emit_now = self._batch_start is None
+            if emit_now:
+                self._batch_start = now
+            else:
+                self._pending = True
+            
+            if self._timer:
+                self._timer.cancel()
+            delay = max(0.0, min(self.min_quiet, self._batch_start + self.max_batch - now))
+            self._timer = threading.Timer(delay, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
         
-        # 分析并推荐
-        context = self.recommender.analyze_context()
-        recommendations = self.recommender.recommend_workflows(context)
+        if emit_now:
+            self._recommend()
+    
+    def _flush(self):
+        """批次结束：如有被合并的事件，补发一次推荐"""
+        with self._lock:
+            pending = self._pending
+            self._pending = False
+            self._batch_start = None
+            self._timer = None
         
-        if recommendations:
+        if pending:
+            self._recommend()
+    
+    def _recommend(self):
+        """根据累积的变更路径推荐（不重新扫描文件树）"""
+        with self._run_lock:
+            with self._lock:
+                changed = sorted(self.changed)
+                self.changed.clear()
+            if not changed:
+                return
+            
+            context = self.recommender.build_context(changed)
+            recommendations = self.recommender.recommend_workflows(context)
+            
             self.recommender.display_recommendations(recommendations)
 
 
@@ -206,33 +368,32 @@ class IntelligentWorkflowDaemon:
         self.recommender = WorkflowRecommender(project_path)
         self.observer = None
         self.running = False
+        self._stop_event = threading.Event()
         
     def start(self):
-        """启动监控"""
+        """启动监控（事件驱动，空闲时不扫描文件树）"""
+        if not WATCHDOG_AVAILABLE:
+            raise RuntimeError("守护模式需要watchdog (pip install watchdog)")
+        
         print(f"🚀 启动智能工作流监控: {self.project_path}")
+        print(f"📡 事件后端: {Observer.__name__}")
+        if issubclass(Observer, PollingObserver):
+            print("⚠️ 当前平台没有原生文件事件支持，watchdog 将退化为定期轮询")
         print("📁 正在监听文件变化...")
         print("⏹️  按 Ctrl+C 停止\n")
         
-        if WATCHDOG_AVAILABLE:
-            # 使用watchdog监控
-            event_handler = IntelligentFileHandler(self.recommender)
-            self.observer = Observer()
-            self.observer.schedule(event_handler, self.project_path, recursive=True)
-            self.observer.start()
+        event_handler = IntelligentFileHandler(self.recommender)
+        self.observer = Observer()
+        self.observer.schedule(event_handler, self.project_path, recursive=True)
+        self.observer.start()
         
         self.running = True
+        self._stop_event.clear()
         
         try:
-            while self.running:
-                if not WATCHDOG_AVAILABLE:
-                    # 轮询模式
-                    context = self.recommender.analyze_context()
-                    recommendations = self.recommender.recommend_workflows(context)
-                    if recommendations:
-                        self.recommender.display_recommendations(recommendations)
-                
-                time.sleep(5)  # 每5秒检查一次
-                
+            # 带超时等待，保证 Windows 下 Ctrl+C 能及时响应
+            while not self._stop_event.wait(1):
+                pass
         except KeyboardInterrupt:
             self.stop()
     
@@ -240,6 +401,7 @@ class IntelligentWorkflowDaemon:
         """停止监控"""
         print("\n🛑 停止智能工作流监控")
         self.running = False
+        self._stop_event.set()
         
         if self.observer:
             self.observer.stop()
@@ -276,17 +438,22 @@ def main():
         # 立即检查一次
         recommendations = daemon.check_now()
         
-        # 询问是否执行
-        if recommendations:
+        # 询问是否执行（按优先级取前三项）；非终端输出时只保留上面的一行JSON
+        ordered = [rec for p in PRIORITIES for rec in recommendations[p]]
+        if ordered and _TTY:
             print("\n是否执行推荐的工作流？")
-            for i, rec in enumerate(recommendations[:3], 1):
+            for i, rec in enumerate(ordered[:3], 1):
                 print(f"  {i}. {rec['workflow']} - {rec['action']}")
             print("  a. 全部执行")
             print("  n. 跳过")
             
     elif args.daemon:
         # 启动守护进程
-        daemon.start()
+        try:
+            daemon.start()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
     else:
         # 默认：立即检查一次
         daemon.check_now()
@@ -11,13 +11,125 @@ import re
 import subprocess
 import time
 import traceback
+import threading
+import functools
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Set, Tuple, Union
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
 import yaml
 
+# 可选：用 Aho-Corasick 自动机一次扫描任务描述，找出全部关键词
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 可选：Hyperscan 多模式扫描后端
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+
+# 超过该大小的文件不做验证扫描，避免压缩打包产物拖慢整体耗时
+MAX_VALIDATE_BYTES = 4 * 1024 * 1024
+
+# 验证器使用的正则，模块加载时编译一次，避免每个文件每次验证都查询 re 的内部缓存
+_RE_GETELEM = re.compile(r'getElementById\s*\([\'"]([\w-]+)[\'"]\)')
+_RE_ID_ATTR = re.compile(r'id\s*=\s*(["\'])([\w-]+)\1')
+# 不区分大小写查找 canvas，避免为整份内容生成小写副本
+_HAS_CANVAS_RE = re.compile(r'canvas', re.IGNORECASE)
+# Canvas 高度赋值与 y 坐标合并为一个正则
+_RE_CANVAS = re.compile(r'canvas\.height\s*=\s*(?P<h>\d+)|y\s*[\+\=]?\s*(?P<y>\d+)')
+# JS 资源配对检查：有结构的模式各自计数（嵌套出现时都要计入，不能合并成一个交替正则）
+_JS_PATTERNS = (
+    ('setI', r'setInterval\s*\([^)]+\)'),
+    ('setT', r'setTimeout\s*\([^)]+\)'),
+    ('addE', r'addEventListener\s*\('),
+    ('psh', r'\.push\([^)]+\)'),
+    ('pop', r'\.pop\(\)'),
+)
+# 纯字面量直接用 str.count 计数，不经过正则引擎
+_JS_LITERALS = (
+    ('clrI', 'clearInterval'),
+    ('clrT', 'clearTimeout'),
+    ('rmE', 'removeEventListener'),
+)
+# CSS 变量定义 / 引用
+_CSS_PATTERNS = (
+    ('cdef', r'--[\w-]+:'),
+    ('cuse', r'var\(--(?P<cvar>[\w-]+)'),
+)
+
+
+def _build_scan(patterns) -> re.Pattern:
+    """把 (分组名, 模式) 列表编译为一个命名分组交替正则"""
+    return re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in patterns))
+
+
+# 未安装 Hyperscan 时逐个模式计数
+_JS_REGEXES = tuple((name, re.compile(pattern)) for name, pattern in _JS_PATTERNS)
+# CSS 变量定义与引用合并为一个正则，按分组名分派到处理函数
+_CSS_SCAN = _build_scan(_CSS_PATTERNS)
+
+# 可选：Hyperscan 把全部模式编译进同一个数据库，一次扫描同时匹配
+_JS_HS_DB = None
+if HYPERSCAN_AVAILABLE:
+    try:
+        _JS_HS_DB = hyperscan.Database()
+        _JS_HS_DB.compile(
+            expressions=[pattern.encode() for _, pattern in _JS_PATTERNS],
+            ids=list(range(len(_JS_PATTERNS))),
+            elements=len(_JS_PATTERNS),
+        )
+    except hyperscan.error:
+        _JS_HS_DB = None
+
+
+
+def _on_css_def(m, state):
+    state['css_defined'].add(m.group('cdef')[:-1])
+
+
+def _on_css_use(m, state):
+    state['css_used'].add(m.group('cvar'))
+
+
+_SCAN_HANDLERS = {'cdef': _on_css_def, 'cuse': _on_css_use}
+
+
+def _scan_source(content: str) -> Dict[str, Any]:
+    """扫描源码，返回 JS 模式计数与 CSS 变量的定义/引用集合"""
+    state = {
+        'counts': {name: content.count(literal) for name, literal in _JS_LITERALS},
+        'css_defined': set(),
+        'css_used': set(),
+    }
+    counts = state['counts']
+    
+    if _JS_HS_DB is not None:
+        hits = [0] * len(_JS_PATTERNS)
+        
+        def on_match(pattern_id, start, end, flags, context):
+            hits[pattern_id] += 1
+        
+        _JS_HS_DB.scan(content.encode('utf-8'), match_event_handler=on_match)
+        for i, (name, _) in enumerate(_JS_PATTERNS):
+            counts[name] = hits[i]
+    else:
+        for name, regex in _JS_REGEXES:
+            counts[name] = sum(1 for _ in regex.finditer(content))
+    
+    handlers = _SCAN_HANDLERS
+    for m in _CSS_SCAN.finditer(content):
+        handlers[m.lastgroup](m, state)
+    return state
+
 
 class TaskType(Enum):
     STANDARD = "standard"
@@ -39,7 +151,7 @@ class ValidationLevel(Enum):
     SKIP = "skip"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ValidationResult:
     name: str
     passed: bool
@@ -49,7 +161,7 @@ class ValidationResult:
     fix_suggestion: str = ""
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TaskAnalysis:
     task_type: TaskType
     execution_mode: ExecutionMode
@@ -58,6 +170,38 @@ class TaskAnalysis:
     reason: str
 
 
+class _ValidationCache:
+    """按 (路径, mtime_ns, 大小) 缓存验证结果，文件被修改后自然失效；超出容量时淘汰最久未用的条目"""
+    
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: Dict[Tuple[Union[str, Path], int, int], ValidationResult] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(file_path: Union[str, Path]) -> Optional[Tuple[Union[str, Path], int, int]]:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (file_path, st.st_mtime_ns, st.st_size)
+    
+    def get(self, key) -> Optional[ValidationResult]:
+        with self._lock:
+            result = self._data.pop(key, None)
+            if result is not None:
+                self._data[key] = result
+        return result
+    
+    def put(self, key, result: ValidationResult):
+        if key is None:
+            return
+        with self._lock:
+            self._data[key] = result
+            if len(self._data) > self.maxsize:
+                del self._data[next(iter(self._data))]
+
+
 class TaskAnalyzer:
     """任务分析器 - 识别任务类型"""
     
@@ -79,35 +223,41 @@ class TaskAnalyzer:
             "refactor", "architecture", "design", "migrate", "integrate"
         ]
     }
+    # 类加载时预先计算 (原始关键词, 小写形式) 与各类型的关键词数量
+    _PATTERNS_LC = {tt: tuple((p, p.lower()) for p in ps) for tt, ps in PATTERNS.items()}
+    _PATTERN_LENS = {tt: len(ps) for tt, ps in PATTERNS.items()}
+    # 全部关键词编译成一个交替正则（长词优先）；前瞻匹配使相互重叠的关键词都能被找到
+    _KEYWORD_RE = re.compile('(?=(' + '|'.join(
+        re.escape(lc) for lc in sorted({lc for pairs in _PATTERNS_LC.values() for _, lc in pairs},
+                                       key=len, reverse=True)
+    ) + '))')
+    # 可选的 Aho-Corasick 自动机，类加载时构建一次
+    _AUTOMATON = None
+    if AHOCORASICK_AVAILABLE:
+        _AUTOMATON = ahocorasick.Automaton()
+        for _pairs in _PATTERNS_LC.values():
+            for _, _lc in _pairs:
+                _AUTOMATON.add_word(_lc, _lc)
+        _AUTOMATON.make_automaton()
+        del _pairs, _lc
+    
+    @classmethod
+    def _match_patterns(cls, desc_lower: str) -> Dict[TaskType, List[str]]:
+        """找出各任务类型命中的关键词（保持 PATTERNS 中的顺序）"""
+        if cls._AUTOMATON is not None:
+            found = {keyword for _, keyword in cls._AUTOMATON.iter(desc_lower)}
+        else:
+            found = {m.group(1) for m in cls._KEYWORD_RE.finditer(desc_lower)}
+        return {task_type: [p for p, lc in pairs if lc in found]
+                for task_type, pairs in cls._PATTERNS_LC.items()}
     
     def analyze(self, task_description: str) -> TaskAnalysis:
-        desc_lower = task_description.lower()
-        
-        best_match = TaskType.UNKNOWN
-        best_confidence = 0.0
-        matched_patterns = []
-        
-        for task_type, patterns in self.PATTERNS.items():
-            matches = [p for p in patterns if p.lower() in desc_lower]
-            if matches:
-                confidence = len(matches) / len(patterns)
-                if confidence > best_confidence:
-                    best_confidence = confidence
-                    best_match = task_type
-                    matched_patterns = matches
-        
-        execution_mode = self._get_execution_mode(best_match)
-        reason = self._get_reason(best_match, matched_patterns)
-        
-        return TaskAnalysis(
-            task_type=best_match,
-            execution_mode=execution_mode,
-            confidence=best_confidence,
-            matched_patterns=matched_patterns,
-            reason=reason
-        )
+        """分析任务类型（相同描述直接使用缓存结果，返回的 matched_patterns 为新列表）"""
+        result = _analyze_task(task_description)
+        return replace(result, matched_patterns=list(result.matched_patterns))
     
-    def _get_execution_mode(self, task_type: TaskType) -> ExecutionMode:
+    @staticmethod
+    def _get_execution_mode(task_type: TaskType) -> ExecutionMode:
         mode_map = {
             TaskType.STANDARD: ExecutionMode.WORKFLOW,
             TaskType.REPETITIVE: ExecutionMode.WORKFLOW,
@@ -117,7 +267,8 @@ class TaskAnalyzer:
         }
         return mode_map.get(task_type, ExecutionMode.BUILTIN)
     
-    def _get_reason(self, task_type: TaskType, patterns: List[str]) -> str:
+    @staticmethod
+    def _get_reason(task_type: TaskType, patterns: List[str]) -> str:
         reasons = {
             TaskType.STANDARD: f"标准化任务，匹配模式: {patterns}，使用预定义工作流",
             TaskType.REPETITIVE: f"重复性任务，匹配模式: {patterns}，生成可复用工作流",
@@ -128,23 +279,63 @@ class TaskAnalyzer:
         return reasons.get(task_type, "未知任务类型")
 
 
+@functools.lru_cache(maxsize=1024)
+def _analyze_task(task_description: str) -> TaskAnalysis:
+    """按描述缓存的任务分析；缓存中的 matched_patterns 为元组，由 TaskAnalyzer.analyze 复制为列表"""
+    desc_lower = task_description.lower()
+    
+    best_match = TaskType.UNKNOWN
+    best_confidence = 0.0
+    matched_patterns = []
+    
+    for task_type, matches in TaskAnalyzer._match_patterns(desc_lower).items():
+        if matches:
+            confidence = len(matches) / TaskAnalyzer._PATTERN_LENS[task_type]
+            if confidence > best_confidence:
+                best_confidence = confidence
+                best_match = task_type
+                matched_patterns = matches
+    
+    return TaskAnalysis(
+        task_type=best_match,
+        execution_mode=TaskAnalyzer._get_execution_mode(best_match),
+        confidence=best_confidence,
+        matched_patterns=tuple(matched_patterns),
+        reason=TaskAnalyzer._get_reason(best_match, matched_patterns)
+    )
+
+
 class CodeValidator:
     """代码验证器 - 静态检查"""
     
     def __init__(self, workspace: str):
         self.workspace = Path(workspace)
+        self._cache = _ValidationCache()
+    
+    def validate_html(self, file_path: Union[str, Path], content: Optional[str] = None) -> ValidationResult:
+        """验证HTML文件（content 为调用方已读取的文件内容；文件未变化时直接返回缓存结果）"""
+        key = self._cache.key(file_path)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._validate_html(file_path, content)
+            self._cache.put(key, result)
+        return result
     
-    def validate_html(self, file_path: str) -> ValidationResult:
-        """验证HTML文件"""
+    def _validate_html(self, file_path: Union[str, Path], content: Optional[str] = None) -> ValidationResult:
         issues = []
         
         try:
-            content = Path(file_path).read_text(encoding='utf-8')
+            if content is None:
+                with open(file_path, encoding='utf-8') as f:
+                    content = f.read()
             
-            js_issues = self._check_javascript_issues(content)
+            # JS 与 CSS 检查共用同一次扫描的结果
+            scan = _scan_source(content)
+            
+            js_issues = self._check_javascript_issues(content, scan)
             issues.extend(js_issues)
             
-            css_issues = self._check_css_issues(content)
+            css_issues = self._check_css_issues(content, scan)
             issues.extend(css_issues)
             
             html_issues = self._check_html_issues(content)
@@ -168,34 +359,30 @@ class CodeValidator:
                 message=f"验证失败: {str(e)}"
             )
     
-    def _check_javascript_issues(self, content: str) -> List[Dict]:
+    def _check_javascript_issues(self, content: str, scan: Optional[Dict] = None) -> List[Dict]:
         issues = []
         
-        setInterval_matches = re.findall(r'setInterval\s*\([^)]+\)', content)
-        clearInterval_matches = re.findall(r'clearInterval', content)
-        if len(setInterval_matches) > len(clearInterval_matches):
+        counts = (scan or _scan_source(content))['counts']
+        
+        if counts['setI'] > counts['clrI']:
             issues.append({
                 'severity': 'error',
                 'type': 'memory_leak',
-                'message': f"发现 {len(setInterval_matches) - len(clearInterval_matches)} 个未清理的 setInterval"
+                'message': f"发现 {counts['setI'] - counts['clrI']} 个未清理的 setInterval"
             })
         
-        setTimeout_matches = re.findall(r'setTimeout\s*\([^)]+\)', content)
-        clearTimeout_matches = re.findall(r'clearTimeout', content)
-        if len(setTimeout_matches) > len(clearTimeout_matches) + 5:
+        if counts['setT'] > counts['clrT'] + 5:
             issues.append({
                 'severity': 'warn',
                 'type': 'memory_leak',
-                'message': f"发现 {len(setTimeout_matches)} 个 setTimeout，建议检查是否需要清理"
+                'message': f"发现 {counts['setT']} 个 setTimeout，建议检查是否需要清理"
             })
         
-        addEventListener_matches = re.findall(r'addEventListener\s*\(', content)
-        removeEventListener_matches = re.findall(r'removeEventListener', content)
-        if len(addEventListener_matches) > len(removeEventListener_matches) * 2:
+        if counts['addE'] > counts['rmE'] * 2:
             issues.append({
                 'severity': 'warn',
                 'type': 'memory_leak',
-                'message': f"事件监听器数量不匹配: 添加 {len(addEventListener_matches)}，移除 {len(removeEventListener_matches)}"
+                'message': f"事件监听器数量不匹配: 添加 {counts['addE']}，移除 {counts['rmE']}"
             })
         
         if 'localStorage' in content:
@@ -206,9 +393,7 @@ class CodeValidator:
                     'message': "localStorage 使用未包裹 try-catch，隐私模式下会报错"
                 })
         
-        pool_push = re.findall(r'\.push\([^)]+\)', content)
-        pool_pop = re.findall(r'\.pop\(\)', content)
-        if pool_push and not pool_pop:
+        if counts['psh'] and not counts['pop']:
             issues.append({
                 'severity': 'warn',
                 'type': 'logic',
@@ -217,14 +402,11 @@ class CodeValidator:
         
         return issues
     
-    def _check_css_issues(self, content: str) -> List[Dict]:
+    def _check_css_issues(self, content: str, scan: Optional[Dict] = None) -> List[Dict]:
         issues = []
         
-        unused_vars = re.findall(r'--[\w-]+:', content)
-        used_vars = re.findall(r'var\(--([\w-]+)', content)
-        defined = set(v.rstrip(':') for v in unused_vars)
-        used = set(used_vars)
-        unused = defined - used
+        scan = scan or _scan_source(content)
+        unused = scan['css_defined'] - scan['css_used']
         if unused:
             issues.append({
                 'severity': 'warn',
@@ -270,15 +452,26 @@ class RuntimeValidator:
     
     def __init__(self, workspace: str):
         self.workspace = Path(workspace)
+        self._cache = _ValidationCache()
     
-    def validate_javascript_runtime(self, file_path: str) -> ValidationResult:
-        """验证JavaScript运行时问题"""
+    def validate_javascript_runtime(self, file_path: Union[str, Path], content: Optional[str] = None) -> ValidationResult:
+        """验证JavaScript运行时问题（content 为调用方已读取的文件内容；文件未变化时直接返回缓存结果）"""
+        key = self._cache.key(file_path)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._validate_javascript_runtime(file_path, content)
+            self._cache.put(key, result)
+        return result
+    
+    def _validate_javascript_runtime(self, file_path: Union[str, Path], content: Optional[str] = None) -> ValidationResult:
         issues = []
         
         try:
-            content = Path(file_path).read_text(encoding='utf-8')
+            if content is None:
+                with open(file_path, encoding='utf-8') as f:
+                    content = f.read()
             
-            if 'canvas' in content.lower() or 'Canvas' in content:
+            if _HAS_CANVAS_RE.search(content):
                 canvas_issues = self._check_canvas_issues(content)
                 issues.extend(canvas_issues)
             
@@ -317,17 +510,19 @@ class RuntimeValidator:
                 })
         
         if 'ctx.fillText' in content or 'ctx.strokeText' in content:
-            lines = content.split('\n')
             max_y = 0
             canvas_height = 450
-            for line in lines:
-                if 'canvas.height' in line:
-                    match = re.search(r'(\d+)', line)
-                    if match:
-                        canvas_height = int(match.group(1))
-                y_match = re.search(r'y\s*[\+\=]?\s*(\d+)', line)
-                if y_match:
-                    max_y = max(max_y, int(y_match.group(1)))
+            y_line_end = -1
+            # 单次扫描整个内容，不再按行切分
+            for m in _RE_CANVAS.finditer(content):
+                if m.lastgroup == 'h':
+                    canvas_height = int(m.group('h'))
+                elif m.start() >= y_line_end:
+                    # 与逐行检查一致：每行只取第一个 y 坐标
+                    max_y = max(max_y, int(m.group('y')))
+                    y_line_end = content.find('\n', m.end())
+                    if y_line_end == -1:
+                        y_line_end = len(content)
             
             if max_y > canvas_height - 20:
                 issues.append({
@@ -341,14 +536,18 @@ class RuntimeValidator:
     def _check_dom_issues(self, content: str) -> List[Dict]:
         issues = []
         
-        getelement_matches = re.findall(r'getElementById\s*\([\'"]([\w-]+)[\'"]\)', content)
-        for elem_id in set(getelement_matches):
-            if f'id="{elem_id}"' not in content and f"id='{elem_id}'" not in content:
-                issues.append({
-                    'severity': 'error',
-                    'type': 'dom',
-                    'message': f"getElementById('{elem_id}') 但HTML中不存在该ID"
-                })
+        referenced = set(_RE_GETELEM.findall(content))
+        if not referenced:
+            return issues
+        
+        # 一次扫描收集所有声明的ID，再与引用的ID做集合差
+        declared = {m.group(2) for m in _RE_ID_ATTR.finditer(content)}
+        for elem_id in referenced - declared:
+            issues.append({
+                'severity': 'error',
+                'type': 'dom',
+                'message': f"getElementById('{elem_id}') 但HTML中不存在该ID"
+            })
         
         return issues
     
@@ -377,6 +576,8 @@ class SmartRouter:
         self.runtime_validator = RuntimeValidator(workspace)
         self.validation_results: List[ValidationResult] = []
         self.execution_log: List[Dict] = []
+        # 与 execution_log 一一对应的 result 序列化结果，写日志时生成一次
+        self._log_json: List[str] = []
         self.auto_heal = True
         self.max_heal_attempts = 999
     
@@ -397,15 +598,12 @@ class SmartRouter:
         print(f"   匹配模式: {analysis.matched_patterns}")
         print(f"   原因: {analysis.reason}")
         
-        self.execution_log.append({
-            "step": "analyze",
-            "result": {
-                "task_type": analysis.task_type.value,
-                "execution_mode": analysis.execution_mode.value,
-                "confidence": analysis.confidence
-            },
-            "timestamp": datetime.now().isoformat()
-        })
+        analysis_dict = {
+            "task_type": analysis.task_type.value,
+            "execution_mode": analysis.execution_mode.value,
+            "confidence": analysis.confidence
+        }
+        self._append_log("analyze", analysis_dict)
         
         if target_files:
             print(f"\n🔍 开始验证目标文件...")
@@ -436,99 +634,157 @@ class SmartRouter:
                 
                 if self.auto_heal:
                     print(f"\n🔄 自动修复模式已启用，尝试自动修复...")
-                    heal_result = self._auto_heal(validation_results)
-                    if heal_result["success"]:
+                    failing = self._blocking_failures(validation_results)
+                    # 有界不动点：阻断性失败集合不再缩小时立即停止
+                    for _ in range(self.max_heal_attempts):
+                        heal_result = self._auto_heal(validation_results)
+                        if not heal_result["success"]:
+                            break
                         print(f"✅ 自动修复成功，重新验证...")
                         validation_results = self._validate_files(target_files)
-                        all_passed = all(r.passed for r in validation_results if r.level == ValidationLevel.BLOCK)
-                        if all_passed:
+                        new_failing = self._blocking_failures(validation_results)
+                        if not new_failing:
                             print(f"✅ 验证通过！")
                             return {
                                 "success": True,
-                                "analysis": {
-                                    "task_type": analysis.task_type.value,
-                                    "execution_mode": analysis.execution_mode.value,
-                                    "confidence": analysis.confidence
-                                },
+                                "analysis": analysis_dict,
                                 "validation": {
                                     "passed": True,
-                                    "results": [{
-                                        "name": r.name,
-                                        "passed": r.passed,
-                                        "level": r.level.value,
-                                        "message": r.message
-                                    } for r in validation_results]
+                                    "results": self._serialize_results(validation_results)
                                 },
                                 "execution_log": self.execution_log,
                                 "auto_healed": True
                             }
+                        if new_failing >= failing:
+                            break
+                        failing = new_failing
                 
                 return {
                     "success": False,
-                    "analysis": {
-                        "task_type": analysis.task_type.value,
-                        "execution_mode": analysis.execution_mode.value,
-                        "confidence": analysis.confidence
-                    },
+                    "analysis": analysis_dict,
                     "validation": {
                         "passed": False,
-                        "results": [{
-                            "name": r.name,
-                            "passed": r.passed,
-                            "level": r.level.value,
-                            "message": r.message,
-                            "details": r.details,
-                            "fix_suggestion": r.fix_suggestion
-                        } for r in validation_results]
+                        "results": self._serialize_results(validation_results, full=True)
                     },
                     "execution_log": self.execution_log
                 }
         
         return {
             "success": True,
-            "analysis": {
-                "task_type": analysis.task_type.value,
-                "execution_mode": analysis.execution_mode.value,
-                "confidence": analysis.confidence
-            },
+            "analysis": analysis_dict,
             "validation": {
                 "passed": True,
-                "results": [{
-                    "name": r.name,
-                    "passed": r.passed,
-                    "level": r.level.value,
-                    "message": r.message
-                } for r in self.validation_results]
+                "results": self._serialize_results(self.validation_results)
             },
             "execution_log": self.execution_log
         }
     
+    @staticmethod
+    def _blocking_failures(results: List[ValidationResult]) -> Set[str]:
+        """返回阻断性失败的验证项名称集合"""
+        return {r.name for r in results if not r.passed and r.level == ValidationLevel.BLOCK}
+    
+    @staticmethod
+    def _serialize_results(results: List[ValidationResult], full: bool = False) -> List[Dict]:
+        """把验证结果转换为返回给调用方的字典列表（full 时附带详情和修复建议）"""
+        if full:
+            return [{
+                "name": r.name,
+                "passed": r.passed,
+                "level": r.level.value,
+                "message": r.message,
+                "details": r.details,
+                "fix_suggestion": r.fix_suggestion
+            } for r in results]
+        return [{
+            "name": r.name,
+            "passed": r.passed,
+            "level": r.level.value,
+            "message": r.message
+        } for r in results]
+    
+    def _append_log(self, step: str, result: Dict):
+        """记录执行日志，同时缓存 result 的 JSON 供生成报告时直接使用"""
+        self.execution_log.append({
+            "step": step,
+            "result": result,
+            "timestamp": datetime.now().isoformat()
+        })
+        self._log_json.append(json.dumps(result, ensure_ascii=False))
+    
     def _validate_files(self, file_paths: List[str]) -> List[ValidationResult]:
-        """验证文件列表"""
+        """验证文件列表（多个文件时并行验证，结果保持输入顺序）"""
+        if len(file_paths) <= 1:
+            per_file = [self._validate_one(f) for f in file_paths]
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+                per_file = list(executor.map(self._validate_one, file_paths))
+        return [r for results in per_file for r in results]
+    
+    def _validate_one(self, file_path: str) -> List[ValidationResult]:
+        """验证单个文件"""
         results = []
         
-        for file_path in file_paths:
-            full_path = self.workspace / file_path if not Path(file_path).is_absolute() else Path(file_path)
-            
-            if not full_path.exists():
-                results.append(ValidationResult(
-                    name=f"文件存在性检查: {file_path}",
-                    passed=False,
-                    level=ValidationLevel.BLOCK,
-                    message=f"文件不存在: {full_path}"
-                ))
-                continue
-            
-            if file_path.endswith('.html'):
-                results.append(self.code_validator.validate_html(str(full_path)))
-                results.append(self.runtime_validator.validate_javascript_runtime(str(full_path)))
-            elif file_path.endswith('.js'):
-                results.append(self.runtime_validator.validate_javascript_runtime(str(full_path)))
-            elif file_path.endswith('.css'):
-                pass
+        # 只构造一次 Path，之后直接传给各验证器
+        full_path = Path(file_path) if os.path.isabs(file_path) else self.workspace / file_path
+        
+        try:
+            st = full_path.stat()
+        except OSError:
+            return [ValidationResult(
+                name=f"文件存在性检查: {file_path}",
+                passed=False,
+                level=ValidationLevel.BLOCK,
+                message=f"文件不存在: {full_path}"
+            )]
+        
+        if file_path.endswith(('.html', '.js')):
+            skipped = self._precheck(file_path, full_path, st.st_size)
+            if skipped:
+                return [skipped]
+        
+        if file_path.endswith('.html'):
+            # 只读取一次，两个验证器共用同一份内容
+            content = self._read_content(full_path)
+            results.append(self.code_validator.validate_html(full_path, content))
+            results.append(self.runtime_validator.validate_javascript_runtime(full_path, content))
+        elif file_path.endswith('.js'):
+            results.append(self.runtime_validator.validate_javascript_runtime(full_path))
+        elif file_path.endswith('.css'):
+            pass
         
         return results
     
+    @staticmethod
+    def _precheck(file_path: str, full_path: Path, size: int) -> Optional[ValidationResult]:
+        """空文件、超大文件和二进制文件不做正则扫描，返回对应的跳过结果"""
+        name = f"验证跳过: {file_path}"
+        if size == 0:
+            return ValidationResult(name=name, passed=True, level=ValidationLevel.SKIP, message="空文件")
+        if size > MAX_VALIDATE_BYTES:
+            return ValidationResult(
+                name=name,
+                passed=False,
+                level=ValidationLevel.WARN,
+                message=f"文件过大 ({size / 1048576:.1f} MB)，超过 {MAX_VALIDATE_BYTES // 1048576} MB 上限，未验证"
+            )
+        try:
+            with full_path.open('rb') as f:
+                head = f.read(4096)
+        except OSError:
+            return None
+        if b'\x00' in head:
+            return ValidationResult(name=name, passed=True, level=ValidationLevel.SKIP, message="二进制文件")
+        return None
+    
+    @staticmethod
+    def _read_content(file_path: Path) -> Optional[str]:
+        """读取待验证文件；读取失败时返回 None，由验证器自行读取并报告错误"""
+        try:
+            return file_path.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            return None
+    
     def _auto_heal(self, validation_results: List[ValidationResult]) -> Dict:
         """自动修复验证失败的问题"""
         fixed_count = 0
@@ -574,40 +830,29 @@ class SmartRouter:
         
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        report_lines = [
-            f"# 验证报告",
-            f"",
-            f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            f"",
-            f"## 执行日志",
-            f"",
-        ]
-        
-        for log in self.execution_log:
-            report_lines.append(f"- **{log['step']}**: {json.dumps(log['result'], ensure_ascii=False)}")
-        
-        report_lines.extend([
-            f"",
-            f"## 验证结果",
-            f"",
-        ])
-        
-        for result in self.validation_results:
-            status = "✅ 通过" if result.passed else "❌ 失败"
-            report_lines.append(f"### {result.name}: {status}")
-            report_lines.append(f"")
-            report_lines.append(f"- **级别**: {result.level.value}")
-            report_lines.append(f"- **消息**: {result.message}")
-            if result.details:
-                report_lines.append(f"- **详情**:")
-                for detail in result.details:
-                    report_lines.append(f"  - {detail}")
-            if result.fix_suggestion:
-                report_lines.append(f"- **修复建议**: {result.fix_suggestion}")
-            report_lines.append(f"")
-        
-        report_content = "\n".join(report_lines)
-        output_path.write_text(report_content, encoding='utf-8')
+        # 边生成边写入，不在内存中拼接整份报告
+        with output_path.open('w', encoding='utf-8', buffering=1 << 16) as f:
+            w = f.write
+            w("# 验证报告\n\n")
+            w(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            w("## 执行日志\n\n")
+            
+            for log, result_json in zip(self.execution_log, self._log_json):
+                w(f"- **{log['step']}**: {result_json}\n")
+            
+            w("\n## 验证结果\n")
+            
+            for result in self.validation_results:
+                status = "✅ 通过" if result.passed else "❌ 失败"
+                w(f"\n### {result.name}: {status}\n\n")
+                w(f"- **级别**: {result.level.value}\n")
+                w(f"- **消息**: {result.message}\n")
+                if result.details:
+                    w("- **详情**:\n")
+                    for detail in result.details:
+                        w(f"  - {detail}\n")
+                if result.fix_suggestion:
+                    w(f"- **修复建议**: {result.fix_suggestion}\n")
         
         return str(output_path)
 
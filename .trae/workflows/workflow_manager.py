@@ -8,44 +8,289 @@ import yaml
 import json
 import os
 import re
+import shlex
+import shutil
+import stat
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import subprocess
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple, Union
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 优先使用 libyaml 的 C 实现
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+# 可选：orjson 输出 JSON 更快
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 WORKFLOW_DIR = Path("e:/traework/00 ai助手研发/.trae/workflows")
 TEMPLATE_DIR = Path("e:/traework/00 ai助手研发/.trae/templates")
 
+# 变量占位符 {{name}}，模块加载时编译一次
+_VAR_RE = re.compile(r'\{\{(\w+)\}\}')
+# 文档模板占位符：键名可以包含 \w 以外的字符（如 work-content）
+_TEMPLATE_VAR_RE = re.compile(r'\{\{([^{}]+)\}\}')
+
+# 出现这些字符的命令需要 shell 解释（管道、重定向、通配、变量展开等）
+_SHELL_METACHARS = frozenset('|&;<>*?`$()[]{}~#\n')
+
+# 内置默认模板（模板目录中不存在同名文件时使用）
+_DEFAULT_TEMPLATES = {
+    'weekly-report.md': '''# {{title}} - 周报
+
+**日期**: {{date}}  
+**作者**: {{author}}
+
+## 本周工作内容
+
+{{work_content}}
+
+## 下周计划
+
+{{next_week_plan}}
+
+## 遇到的问题
+
+{{issues}}
+
+---
+*由 AI 自动生成*
+''',
+    'meeting-notes.md': '''# 会议纪要
+
+**会议主题**: {{topic}}  
+**时间**: {{date}} {{time}}  
+**参会人员**: {{attendees}}
+
+## 会议内容
+
+{{content}}
+
+## 待办事项
+
+{{action_items}}
+
+---
+*由 AI 自动生成*
+'''
+}
+
+# 模板文件缓存：路径 -> (mtime_ns, 编译后的片段列表)
+_TEMPLATE_FILE_CACHE: Dict[str, tuple] = {}
+# 默认模板编译结果：模板名 -> 片段列表
+_DEFAULT_SEGMENTS: Dict[str, list] = {}
+
+# 已解析的工作流YAML缓存：路径 -> (mtime_ns, size, 数据)，按最近使用淘汰
+_YAML_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_YAML_CACHE_SIZE = 256
+_YAML_CACHE_LOCK = threading.Lock()
+
+
+def _load_yaml_cached(path, st: Optional[os.stat_result] = None) -> Any:
+    """读取并解析YAML文件；文件的 mtime 和大小未变时直接返回缓存的解析结果（调用方不应修改返回值）
+    
+    st 为调用方已取得的 stat 结果（如 DirEntry.stat()），省略时自行 stat。
+    """
+    key = str(path)
+    if st is None:
+        st = os.stat(key)
+    with _YAML_CACHE_LOCK:
+        entry = _YAML_CACHE.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            _YAML_CACHE.move_to_end(key)
+            return entry[2]
+    
+    with open(key, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=_YamlLoader)
+    with _YAML_CACHE_LOCK:
+        _YAML_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+        _YAML_CACHE.move_to_end(key)
+        if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
+    return data
+
+
+def _compile_template(text: str) -> List[Union[str, tuple]]:
+    """将模板拆分为字面量字符串与 ('var', 变量名) 交替的片段列表"""
+    parts = _TEMPLATE_VAR_RE.split(text)
+    segments: List[Union[str, tuple]] = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            segments.append(('var', part))
+        elif part:
+            segments.append(part)
+    return segments
+
+
+def _render_template(segments: List[Union[str, tuple]], values: Dict[str, Any]) -> str:
+    """按片段列表渲染模板，未提供的变量保留原占位符"""
+    return "".join(
+        seg if isinstance(seg, str)
+        else (str(values[seg[1]]) if seg[1] in values else '{{' + seg[1] + '}}')
+        for seg in segments
+    )
+
+
+def _load_template(path) -> Optional[List[Union[str, tuple]]]:
+    """读取并编译模板文件，mtime 未变时返回缓存结果；文件不存在时返回 None"""
+    key = str(path)
+    try:
+        st = os.stat(key)
+    except OSError:
+        return None
+    entry = _TEMPLATE_FILE_CACHE.get(key)
+    if entry is not None and entry[0] == st.st_mtime_ns:
+        return entry[1]
+    
+    with open(key, 'r', encoding='utf-8') as f:
+        segments = _compile_template(f.read())
+    _TEMPLATE_FILE_CACHE[key] = (st.st_mtime_ns, segments)
+    return segments
+
+
+def _split_simple_command(command: str) -> Optional[List[str]]:
+    """将不含 shell 元字符的命令拆分为参数列表；需要 shell 时返回 None"""
+    # Windows 下命令依赖 cmd.exe 的解析与内建命令，始终交给 shell
+    if os.name == 'nt' or any(c in _SHELL_METACHARS for c in command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    return argv or None
+
+
+def _build_step_graph(steps: List[Dict]) -> Tuple[List[int], List[List[int]]]:
+    """按 depends_on 构建步骤依赖图，返回 (入度列表, 后继列表)；依赖的步骤不存在时抛出 ValueError
+    
+    未声明 depends_on 的步骤默认依赖前一个步骤；depends_on: [] 表示无依赖。
+    """
+    n = len(steps)
+    ids = [str(step.get('id', i + 1)) for i, step in enumerate(steps)]
+    index = {step_id: i for i, step_id in enumerate(ids)}
+    deg_in = [0] * n
+    successors: List[List[int]] = [[] for _ in range(n)]
+    
+    for i, step in enumerate(steps):
+        if 'depends_on' in step:
+            deps = step['depends_on'] or []
+            if not isinstance(deps, list):
+                deps = [deps]
+        else:
+            deps = [ids[i - 1]] if i else []
+        for dep in deps:
+            j = index.get(str(dep))
+            if j is None:
+                raise ValueError(f"步骤 {step.get('name', i+1)} 依赖的步骤 '{dep}' 不存在")
+            successors[j].append(i)
+            deg_in[i] += 1
+    return deg_in, successors
+
+
+def _has_cycle(deg_in: List[int], successors: List[List[int]]) -> bool:
+    """Kahn 算法检查依赖图中是否存在环"""
+    remaining = list(deg_in)
+    ready = [i for i, d in enumerate(remaining) if d == 0]
+    visited = 0
+    while ready:
+        i = ready.pop()
+        visited += 1
+        for k in successors[i]:
+            remaining[k] -= 1
+            if remaining[k] == 0:
+                ready.append(k)
+    return visited < len(remaining)
+
+
+def _dumps(obj: Any, indent: bool = True) -> str:
+    """序列化为 JSON 文本，非 ASCII 字符原样输出"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, option=option).decode('utf-8')
+        except TypeError:
+            # orjson 不支持的类型（如超出 64 位的整数）交给标准库处理
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+
+def _load_workflow_meta(entry: os.DirEntry) -> Dict:
+    """读取单个工作流文件的摘要信息（解析失败时返回带 error 的条目）"""
+    stem = entry.name[:-5]
+    try:
+        # DirEntry.stat() 在 Windows 上直接来自目录枚举结果，无需额外系统调用
+        data = _load_yaml_cached(entry.path, entry.stat())
+        return {
+            "name": data.get('name', stem),
+            "description": data.get('description', ''),
+            "file": entry.path,
+            "version": data.get('version', '1.0.0'),
+            "steps_count": len(data.get('steps', []))
+        }
+    except Exception as e:
+        return {
+            "name": stem,
+            "error": str(e),
+            "file": entry.path
+        }
+
+
+@dataclass(slots=True)
+class StepResult:
+    """单个步骤的执行结果"""
+    status: str
+    message: Optional[str] = None
+    output: Optional[str] = None
+    error: Optional[str] = None
+    save_as: Optional[str] = None
+    step_id: Any = None
+    step_name: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        """转换为字典（包含全部字段，未设置的为 None），用于 JSON 输出"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
 
 class WorkflowManager:
+    # 目录只需在进程内创建一次
+    _dirs_ready = False
+    
     def __init__(self):
         self.workflow_dir = WORKFLOW_DIR
         self.template_dir = TEMPLATE_DIR
-        self.workflow_dir.mkdir(parents=True, exist_ok=True)
-        self.template_dir.mkdir(parents=True, exist_ok=True)
+        if not WorkflowManager._dirs_ready:
+            self.workflow_dir.mkdir(parents=True, exist_ok=True)
+            self.template_dir.mkdir(parents=True, exist_ok=True)
+            WorkflowManager._dirs_ready = True
+        # 动作名 -> 处理函数
+        self._actions = {
+            'run_command': self._run_command_step,
+            'generate_document': self._generate_document_step,
+            'open_file': self._open_file_step,
+            'notify': self._notify_step,
+        }
         
     def list_workflows(self) -> List[Dict]:
         """列出所有可用工作流"""
-        workflows = []
-        for yaml_file in self.workflow_dir.glob("*.yaml"):
-            try:
-                with open(yaml_file, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                    workflows.append({
-                        "name": data.get('name', yaml_file.stem),
-                        "description": data.get('description', ''),
-                        "file": str(yaml_file),
-                        "version": data.get('version', '1.0.0'),
-                        "steps_count": len(data.get('steps', []))
-                    })
-            except Exception as e:
-                workflows.append({
-                    "name": yaml_file.stem,
-                    "error": str(e),
-                    "file": str(yaml_file)
-                })
-        return workflows
+        # scandir 一次取得目录项及其类型，不为每个文件构造 Path 或额外 stat
+        with os.scandir(self.workflow_dir) as it:
+            entries = [e for e in it
+                       if e.name.endswith('.yaml') and not e.name.startswith('.') and e.is_file()]
+        if not entries:
+            return []
+        # 逐个文件读取解析互不依赖，用线程池并行；单个文件出错只影响自身条目
+        with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 1) * 4, len(entries))) as executor:
+            return list(executor.map(_load_workflow_meta, entries))
     
     def save_workflow(self, name: str, description: str, steps: List[Dict], triggers: List[str] = None) -> Dict:
         """保存新工作流"""
@@ -58,63 +303,163 @@ class WorkflowManager:
             "steps": steps
         }
         
+        # 声明了依赖关系时在保存前校验，避免执行时才发现依赖缺失或循环
+        if any('depends_on' in step for step in steps):
+            try:
+                deg_in, successors = _build_step_graph(steps)
+            except ValueError as e:
+                return {"status": "error", "message": f"保存失败: {e}"}
+            if _has_cycle(deg_in, successors):
+                return {"status": "error", "message": "保存失败: 工作流步骤存在循环依赖"}
+        
         file_path = self.workflow_dir / f"{name}.yaml"
+        tmp_name = None
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                yaml.dump(workflow_data, f, allow_unicode=True, sort_keys=False)
-                
+            # 先写入同目录临时文件再原子替换，避免中途失败留下半个文件；
+            # 以 0666 创建，由系统按 umask 得到新文件的默认权限
+            candidate = str(self.workflow_dir / f".{name}.{os.urandom(6).hex()}.tmp")
+            fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            tmp_name = candidate
+            with open(fd, 'w', encoding='utf-8') as f:
+                yaml.dump(workflow_data, f, Dumper=_YamlDumper, allow_unicode=True, sort_keys=False)
+            # 覆盖已有文件时沿用其原权限
+            try:
+                os.chmod(tmp_name, stat.S_IMODE(os.stat(file_path).st_mode))
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_name, file_path)
+            
             return {
                 "status": "success",
                 "message": f"工作流 '{name}' 已保存",
                 "path": str(file_path)
             }
         except Exception as e:
+            if tmp_name and os.path.exists(tmp_name):
+                os.remove(tmp_name)
             return {
                 "status": "error",
                 "message": f"保存失败: {str(e)}"
             }
     
-    def execute_workflow(self, workflow_name: str, context: Dict = None) -> Dict:
-        """执行工作流"""
+    def execute_workflow(self, workflow_name: str, context: Dict = None, sequential: bool = False) -> Dict:
+        """执行工作流（sequential 为 True 时忽略 depends_on，严格按顺序执行）"""
         workflow_file = self.workflow_dir / f"{workflow_name}.yaml"
-        if not workflow_file.exists():
-            return {"status": "error", "message": f"工作流 '{workflow_name}' 不存在"}
-        
+        # 不单独检查 exists()，由读取时的 stat 判断文件是否存在
         try:
-            with open(workflow_file, 'r', encoding='utf-8') as f:
-                workflow = yaml.safe_load(f)
+            workflow = _load_yaml_cached(workflow_file)
+        except FileNotFoundError:
+            return {"status": "error", "message": f"工作流 '{workflow_name}' 不存在"}
         except Exception as e:
             return {"status": "error", "message": f"读取工作流失败: {str(e)}"}
         
-        results = []
         variables = context or {}
-        variables['current_date'] = datetime.now().strftime('%Y-%m-%d')
-        variables['current_time'] = datetime.now().strftime('%H:%M:%S')
+        # 日期与时间取自同一时刻，避免跨午夜时两者不一致
+        now = datetime.now()
+        variables['current_date'] = now.strftime('%Y-%m-%d')
+        variables['current_time'] = now.strftime('%H:%M:%S')
+        
+        steps = workflow.get('steps', [])
+        # 没有任何步骤声明 depends_on 时保持原有的顺序执行
+        if sequential or not any('depends_on' in step for step in steps):
+            return self._execute_sequential(workflow_name, steps, variables)
+        return self._execute_dag(workflow_name, steps, variables)
+    
+    def _execute_sequential(self, workflow_name: str, steps: List[Dict], variables: Dict) -> Dict:
+        """按声明顺序逐个执行步骤"""
+        results = []
         
-        for i, step in enumerate(workflow.get('steps', [])):
+        for i, step in enumerate(steps):
             step_result = self._execute_step(step, variables)
-            step_result['step_id'] = step.get('id', i + 1)
-            step_result['step_name'] = step.get('name', f'Step {i + 1}')
+            step_result.step_id = step.get('id', i + 1)
+            step_result.step_name = step.get('name', f'Step {i + 1}')
             results.append(step_result)
             
-            if step_result.get('status') == 'error':
+            if step_result.status == 'error':
                 return {
                     "status": "error",
                     "message": f"步骤 {step.get('name', i+1)} 执行失败",
-                    "step_results": results
+                    "step_results": [r.to_dict() for r in results]
                 }
             
             # 保存变量
-            if step_result.get('save_as'):
-                variables[step_result['save_as']] = step_result.get('output', '')
+            if step_result.save_as:
+                variables[step_result.save_as] = step_result.output or ''
         
         return {
             "status": "success",
             "workflow": workflow_name,
-            "results": results
+            "results": [r.to_dict() for r in results]
         }
     
-    def _execute_step(self, step: Dict, variables: Dict) -> Dict:
+    def _execute_dag(self, workflow_name: str, steps: List[Dict], variables: Dict) -> Dict:
+        """按 depends_on 构建依赖图，就绪的步骤并发执行
+        
+        变量只在调度线程中写入，每个步骤启动时拿到当前变量的快照。
+        """
+        n = len(steps)
+        try:
+            deg_in, successors = _build_step_graph(steps)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        
+        ready = deque(i for i in range(n) if deg_in[i] == 0)
+        results: Dict[int, StepResult] = {}
+        failed: Optional[int] = None
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(32, n))) as executor:
+            running = {}
+            while ready or running:
+                while ready and failed is None:
+                    i = ready.popleft()
+                    running[executor.submit(self._execute_step, steps[i], dict(variables))] = i
+                if not running:
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    step = steps[i]
+                    step_result = future.result()
+                    step_result.step_id = step.get('id', i + 1)
+                    step_result.step_name = step.get('name', f'Step {i + 1}')
+                    results[i] = step_result
+                    
+                    if step_result.status == 'error':
+                        if failed is None:
+                            failed = i
+                        continue
+                    
+                    # 保存变量
+                    if step_result.save_as:
+                        variables[step_result.save_as] = step_result.output or ''
+                    
+                    for k in successors[i]:
+                        deg_in[k] -= 1
+                        if deg_in[k] == 0:
+                            ready.append(k)
+        
+        ordered = [results[i].to_dict() for i in sorted(results)]
+        if failed is not None:
+            return {
+                "status": "error",
+                "message": f"步骤 {steps[failed].get('name', failed+1)} 执行失败",
+                "step_results": ordered
+            }
+        if len(results) < n:
+            return {
+                "status": "error",
+                "message": "工作流步骤存在循环依赖",
+                "step_results": ordered
+            }
+        
+        return {
+            "status": "success",
+            "workflow": workflow_name,
+            "results": ordered
+        }
+    
+    def _execute_step(self, step: Dict, variables: Dict) -> StepResult:
         """执行单个步骤"""
         action = step.get('action')
         params = step.get('params', {})
@@ -122,168 +467,147 @@ class WorkflowManager:
         # 替换变量
         params = self._substitute_variables(params, variables)
         
-        if action == 'run_command':
-            return self._run_command_step(params)
-        elif action == 'generate_document':
-            return self._generate_document_step(params)
-        elif action == 'open_file':
-            return self._open_file_step(params)
-        elif action == 'notify':
-            return self._notify_step(params)
-        else:
-            return {"status": "error", "message": f"未知动作: {action}"}
+        handler = self._actions.get(action)
+        if handler is None:
+            return StepResult("error", message=f"未知动作: {action}")
+        return handler(params)
     
     def _substitute_variables(self, obj: Any, variables: Dict) -> Any:
-        """替换对象中的变量占位符"""
+        """替换对象中的变量占位符
+        
+        只复制确实发生替换的容器，其余子结构原样返回（可能是 YAML 缓存中的对象，调用方不应修改）。
+        """
         if isinstance(obj, str):
-            pattern = r'\{\{(\w+)\}\}'
+            if '{{' not in obj:
+                return obj
             def replace_var(match):
                 var_name = match.group(1)
                 return str(variables.get(var_name, match.group(0)))
-            return re.sub(pattern, replace_var, obj)
+            return _VAR_RE.sub(replace_var, obj)
         elif isinstance(obj, dict):
-            return {k: self._substitute_variables(v, variables) for k, v in obj.items()}
+            new_obj = None
+            for k, v in obj.items():
+                new_v = self._substitute_variables(v, variables)
+                if new_v is not v:
+                    if new_obj is None:
+                        new_obj = dict(obj)
+                    new_obj[k] = new_v
+            return obj if new_obj is None else new_obj
         elif isinstance(obj, list):
-            return [self._substitute_variables(item, variables) for item in obj]
+            new_obj = None
+            for i, item in enumerate(obj):
+                new_item = self._substitute_variables(item, variables)
+                if new_item is not item:
+                    if new_obj is None:
+                        new_obj = list(obj)
+                    new_obj[i] = new_item
+            return obj if new_obj is None else new_obj
         return obj
     
-    def _run_command_step(self, params: Dict) -> Dict:
+    def _run_command_step(self, params: Dict) -> StepResult:
         """执行命令步骤"""
         command = params.get('command')
         if not command:
-            return {"status": "error", "message": "未指定命令"}
+            return StepResult("error", message="未指定命令")
         
+        # 仅执行命令时才需要 subprocess，延迟导入以加快 list/info 等命令的启动
+        import subprocess
+        run_kwargs = {
+            'capture_output': True,
+            'text': True,
+            'timeout': params.get('timeout', 30)
+        }
+        argv = _split_simple_command(command)
         try:
-            result = subprocess.run(
-                command, 
-                shell=True, 
-                capture_output=True, 
-                text=True,
-                timeout=params.get('timeout', 30)
+            if argv is not None:
+                try:
+                    # 简单命令直接执行，省去一次 shell 进程
+                    result = subprocess.run(argv, **run_kwargs)
+                except OSError:
+                    # 可能是 shell 内建命令或变量赋值，回退到 shell
+                    result = subprocess.run(command, shell=True, **run_kwargs)
+            else:
+                result = subprocess.run(command, shell=True, **run_kwargs)
+            return StepResult(
+                "success" if result.returncode == 0 else "error",
+                output=result.stdout.strip(),
+                error=result.stderr.strip() if result.stderr else None,
+                save_as=params.get('save_as')
             )
-            return {
-                "status": "success" if result.returncode == 0 else "error",
-                "output": result.stdout.strip(),
-                "error": result.stderr.strip() if result.stderr else None,
-                "save_as": params.get('save_as')
-            }
         except subprocess.TimeoutExpired:
-            return {"status": "error", "message": "命令执行超时"}
+            return StepResult("error", message="命令执行超时")
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return StepResult("error", message=str(e))
     
-    def _generate_document_step(self, params: Dict) -> Dict:
+    def _generate_document_step(self, params: Dict) -> StepResult:
         """生成文档步骤"""
         template_name = params.get('template')
         variables = params.get('variables', {})
         output_path = params.get('output')
         
         if not template_name or not output_path:
-            return {"status": "error", "message": "缺少模板或输出路径"}
+            return StepResult("error", message="缺少模板或输出路径")
         
         template_file = self.template_dir / template_name
-        if not template_file.exists():
+        segments = _load_template(template_file)
+        from_file = segments is not None
+        if segments is None:
             # 尝试使用默认模板
             default_content = self._create_default_template(template_name)
-            if default_content:
-                template_content = default_content
-            else:
-                return {"status": "error", "message": f"模板 '{template_name}' 不存在"}
-        else:
-            with open(template_file, 'r', encoding='utf-8') as f:
-                template_content = f.read()
-        
-        # 替换模板变量
-        for key, value in variables.items():
-            template_content = template_content.replace(f'{{{{{key}}}}}', str(value))
+            if not default_content:
+                return StepResult("error", message=f"模板 '{template_name}' 不存在")
+            segments = _DEFAULT_SEGMENTS.get(template_name)
+            if segments is None:
+                segments = _DEFAULT_SEGMENTS[template_name] = _compile_template(default_content)
         
         # 确保输出目录存在
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(template_content)
+        if not variables and from_file:
+            # 无变量可替换时直接按字节复制模板文件，省去解码与重新编码
+            shutil.copyfile(template_file, output_file)
+        else:
+            # 按预编译片段拼接，无需逐次正则扫描
+            values = {str(key): value for key, value in variables.items()} if variables else {}
+            output_file.write_text(_render_template(segments, values), encoding='utf-8')
         
-        return {
-            "status": "success",
-            "output": str(output_file),
-            "save_as": params.get('save_as')
-        }
+        return StepResult("success", output=str(output_file), save_as=params.get('save_as'))
     
-    def _open_file_step(self, params: Dict) -> Dict:
+    def _open_file_step(self, params: Dict) -> StepResult:
         """打开文件步骤"""
         file_path = params.get('path')
         if not file_path:
-            return {"status": "error", "message": "未指定文件路径"}
+            return StepResult("error", message="未指定文件路径")
         
         file_path = Path(file_path)
         if not file_path.exists():
-            return {"status": "error", "message": f"文件不存在: {file_path}"}
+            return StepResult("error", message=f"文件不存在: {file_path}")
         
         try:
             # 使用系统默认程序打开
             os.startfile(str(file_path))
-            return {
-                "status": "success",
-                "message": f"已打开: {file_path}"
-            }
+            return StepResult("success", message=f"已打开: {file_path}")
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return StepResult("error", message=str(e))
     
-    def _notify_step(self, params: Dict) -> Dict:
+    def _notify_step(self, params: Dict) -> StepResult:
         """通知步骤"""
         message = params.get('message', '工作流执行完成')
         print(f"[通知] {message}")
-        return {
-            "status": "success",
-            "message": message
-        }
+        return StepResult("success", message=message)
     
-    def _create_default_template(self, template_name: str) -> Optional[str]:
-        """创建默认模板"""
-        templates = {
-            'weekly-report.md': '''# {{title}} - 周报
-
-**日期**: {{date}}  
-**作者**: {{author}}
-
-## 本周工作内容
-
-{{work_content}}
-
-## 下周计划
-
-{{next_week_plan}}
-
-## 遇到的问题
-
-{{issues}}
-
----
-*由 AI 自动生成*
-''',
-            'meeting-notes.md': '''# 会议纪要
-
-**会议主题**: {{topic}}  
-**时间**: {{date}} {{time}}  
-**参会人员**: {{attendees}}
-
-## 会议内容
-
-{{content}}
-
-## 待办事项
-
-{{action_items}}
-
----
-*由 AI 自动生成*
-'''
-        }
-        return templates.get(template_name)
+    @staticmethod
+    def _create_default_template(template_name: str) -> Optional[str]:
+        """获取内置默认模板"""
+        return _DEFAULT_TEMPLATES.get(template_name)
 
 
 def main():
+    import argparse
+    import base64
+    import contextlib
+    
     parser = argparse.ArgumentParser(
         description='Trae Workflow Manager - 工作流管理系统',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -304,6 +628,8 @@ def main():
     run_parser = subparsers.add_parser('run', help='执行工作流')
     run_parser.add_argument('workflow', help='工作流名称')
     run_parser.add_argument('--var', action='append', help='变量 (key=value)')
+    run_parser.add_argument('--context-b64', help='base64 编码的 JSON 变量对象，值可以是任意 JSON 类型（--var 优先）')
+    run_parser.add_argument('--sequential', action='store_true', help='忽略 depends_on，按顺序执行所有步骤')
     
     # info 命令
     info_parser = subparsers.add_parser('info', help='查看工作流详情')
@@ -319,28 +645,31 @@ def main():
     
     if args.command == 'list':
         workflows = manager.list_workflows()
-        print(json.dumps(workflows, ensure_ascii=False, indent=2))
+        print(_dumps(workflows))
         
     elif args.command == 'run':
         context = {}
+        if args.context_b64:
+            context.update(json.loads(base64.b64decode(args.context_b64)))
         if args.var:
             for var in args.var:
                 if '=' in var:
                     key, value = var.split('=', 1)
                     context[key] = value
-        result = manager.execute_workflow(args.workflow, context)
-        print(json.dumps(result, ensure_ascii=False, indent=2))
+        # 步骤自身的输出转到 stderr，stdout 只输出结果 JSON，供 workflow_runner 等调用方解析
+        with contextlib.redirect_stdout(sys.stderr):
+            result = manager.execute_workflow(args.workflow, context, sequential=args.sequential)
+        print(_dumps(result))
         
     elif args.command == 'info':
         workflow_file = WORKFLOW_DIR / f"{args.workflow}.yaml"
-        if workflow_file.exists():
-            with open(workflow_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
-            print(json.dumps(data, ensure_ascii=False, indent=2))
+        try:
+            data = _load_yaml_cached(workflow_file)
+        except FileNotFoundError:
+            print(_dumps({"error": f"工作流 '{args.workflow}' 不存在"}, indent=False))
         else:
-            print(json.dumps({"error": f"工作流 '{args.workflow}' 不存在"}, ensure_ascii=False))
+            print(_dumps(data))
 
 
 if __name__ == '__main__':
-    import argparse
     main()
@@ -5,19 +5,147 @@ Trae Workflow Manager V2 - 自验证闭环工作流系统
 """
 
 import yaml
+import builtins
+import functools
 import json
 import os
 import re
+import shlex
 import sys
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 import subprocess
+import threading
 import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# 优先使用 libyaml 的 C 实现
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 WORKFLOW_DIR = Path("e:/traework/00 ai助手研发/.trae/workflows")
 TEMPLATE_DIR = Path("e:/traework/00 ai助手研发/.trae/templates")
 
+# 已解析的工作流YAML缓存：路径 -> (mtime_ns, size, 数据)，按最近使用淘汰
+_YAML_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_YAML_CACHE_SIZE = 256
+_YAML_CACHE_LOCK = threading.Lock()
+# 工作流校验结果缓存：路径 -> (mtime_ns, size, 结果)，结果中的 issues/warnings 以元组保存
+_VALIDATE_CACHE: Dict[str, tuple] = {}
+
+
+def _copy_validation(result: Dict) -> Dict:
+    """复制缓存的校验结果，issues/warnings 转为新列表，避免调用方修改缓存"""
+    return {**result, "issues": list(result["issues"]), "warnings": list(result["warnings"])}
+
+
+# 出现这些字符的命令需要 shell 解释（管道、重定向、通配、变量展开等）
+_SHELL_METACHARS = frozenset('|&;<>*?`$()[]{}~#\n')
+# 用系统默认程序打开文件的命令；Windows 使用 os.startfile
+if sys.platform == 'win32':
+    _OPENER = None
+elif sys.platform == 'darwin':
+    _OPENER = ('open',)
+else:
+    _OPENER = ('xdg-open',)
+# 等待打开程序退出的时间（秒），超时后不再阻塞工作流
+_OPENER_WAIT = 5
+
+# 失败诊断规则：(错误关键词, 修复建议)，按顺序输出
+DIAGNOSIS_RULES = [
+    (("filenotfounderror", "文件不存在"), ("检查路径是否正确", "检查工作目录", "创建所需目录")),
+    (("permissionerror", "权限"), ("检查文件权限", "以管理员身份运行")),
+    (("modulenotfounderror", "no module"), ("安装缺失依赖", "检查虚拟环境")),
+    (("timeout", "超时"), ("增加超时时间", "检查网络连接", "检查资源占用")),
+    (("syntaxerror", "语法错误"), ("检查代码语法", "运行 linter 检查")),
+]
+_DIAGNOSIS_KEYWORDS = {kw: i for i, (keywords, _) in enumerate(DIAGNOSIS_RULES) for kw in keywords}
+# 关键词均为小写，匹配前先把错误信息转为小写（IGNORECASE 的 Unicode 折叠会匹配到字典中没有的写法）
+_DIAGNOSIS_RE = re.compile('|'.join(map(re.escape, _DIAGNOSIS_KEYWORDS)))
+
+# 超过该大小的文件做字面量断言时分块流式读取
+STREAM_ASSERT_BYTES = 1_000_000
+STREAM_CHUNK_CHARS = 64 * 1024
+@functools.lru_cache(maxsize=256)
+def _split_simple_command(command: str) -> Optional[Tuple[str, ...]]:
+    """将不含 shell 元字符的命令拆分为参数元组（按最近使用缓存有限条目）；需要 shell 时返回 None"""
+    # Windows 下命令依赖 cmd.exe 的解析与内建命令，始终交给 shell
+    if os.name == 'nt' or any(c in _SHELL_METACHARS for c in command):
+        return None
+    try:
+        return tuple(shlex.split(command)) or None
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_assert(condition: str):
+    """编译断言表达式（条件在变量替换之后，按最近使用保留有限条目）"""
+    return compile(condition, '<assert>', 'eval')
+
+
+def _run_shell_command(command: str, **kwargs) -> subprocess.CompletedProcess:
+    """执行命令：简单命令直接执行省去一次 shell 进程，其余交给 shell"""
+    argv = _split_simple_command(command)
+    if argv is not None:
+        try:
+            return subprocess.run(argv, **kwargs)
+        except OSError:
+            # 可能是 shell 内建命令或变量赋值，回退到 shell
+            pass
+    return subprocess.run(command, shell=True, **kwargs)
+
+
+def _load_yaml_cached(path, st: Optional[os.stat_result] = None) -> Any:
+    """读取并解析YAML文件；文件的 mtime 和大小未变时直接返回缓存的解析结果（调用方不应修改返回值）
+    
+    st 为调用方已取得的 stat 结果，省略时自行 stat。
+    """
+    key = str(path)
+    if st is None:
+        st = os.stat(key)
+    with _YAML_CACHE_LOCK:
+        entry = _YAML_CACHE.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            _YAML_CACHE.move_to_end(key)
+            return entry[2]
+    
+    with open(key, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=_YamlLoader)
+    with _YAML_CACHE_LOCK:
+        _YAML_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+        _YAML_CACHE.move_to_end(key)
+        if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
+    return data
+
+
+def _load_workflow_meta(yaml_file: Path) -> Dict:
+    """读取单个工作流文件的摘要信息（解析失败时返回带 error 的条目）"""
+    try:
+        data = _load_yaml_cached(yaml_file)
+        return {
+            "name": data.get('name', yaml_file.stem),
+            "description": data.get('description', ''),
+            "file": str(yaml_file),
+            "version": data.get('version', '1.0.0'),
+            "steps_count": len(data.get('steps', [])),
+            "has_verification": any(
+                s.get('action') == 'verify' 
+                for s in data.get('steps', [])
+            )
+        }
+    except Exception as e:
+        return {
+            "name": yaml_file.stem,
+            "error": str(e),
+            "file": str(yaml_file)
+        }
+
 
 class VerificationEngine:
     """验证引擎 - 支持多种验证类型"""
@@ -35,9 +163,8 @@ class VerificationEngine:
     def verify_command_success(command: str, timeout: int = 30) -> Tuple[bool, str]:
         """验证命令执行成功"""
         try:
-            result = subprocess.run(
+            result = _run_shell_command(
                 command,
-                shell=True,
                 capture_output=True,
                 text=True,
                 timeout=timeout
@@ -58,15 +185,19 @@ class VerificationEngine:
             return False, f"文件不存在: {file}"
         
         try:
-            content = file_path.read_text(encoding='utf-8')
-            missing = []
-            for pattern in contains:
-                if exact_match:
-                    if pattern not in content:
-                        missing.append(pattern)
-                else:
-                    if not re.search(pattern, content, re.IGNORECASE):
-                        missing.append(pattern)
+            if exact_match and file_path.stat().st_size > STREAM_ASSERT_BYTES:
+                found = VerificationEngine._scan_literals(file_path, contains)
+                missing = [pattern for pattern in contains if pattern not in found]
+            else:
+                content = file_path.read_text(encoding='utf-8')
+                missing = []
+                for pattern in contains:
+                    if exact_match:
+                        if pattern not in content:
+                            missing.append(pattern)
+                    else:
+                        if not re.search(pattern, content, re.IGNORECASE):
+                            missing.append(pattern)
             
             if missing:
                 return False, f"内容断言失败，缺少: {missing}"
@@ -74,6 +205,26 @@ class VerificationEngine:
         except Exception as e:
             return False, f"读取文件失败: {str(e)}"
     
+    @staticmethod
+    def _scan_literals(file_path: Path, literals: List[str]) -> set:
+        """分块读取大文件查找字面量，全部找到后提前结束；返回找到的字面量集合"""
+        remaining = set(literals)
+        found = set()
+        # 相邻块之间保留足够的重叠，跨块边界的匹配也能找到
+        overlap = max((len(p) for p in remaining), default=1) - 1
+        tail = ''
+        with open(file_path, 'r', encoding='utf-8') as f:
+            while remaining:
+                chunk = f.read(STREAM_CHUNK_CHARS)
+                if not chunk:
+                    break
+                window = tail + chunk
+                for pattern in [p for p in remaining if p in window]:
+                    remaining.discard(pattern)
+                    found.add(pattern)
+                tail = window[-overlap:] if overlap > 0 else ''
+        return found
+    
     @staticmethod
     def verify_diagnostics() -> Tuple[bool, str]:
         """验证代码诊断（模拟，实际由 IDE 提供）"""
@@ -97,11 +248,24 @@ class VerificationEngine:
         except json.JSONDecodeError as e:
             return False, f"JSON 格式无效: {path}\n错误: {str(e)}"
     
+    @staticmethod
+    def python_import_command(module: str) -> str:
+        """检查模块可导入所用的命令"""
+        return f'python -c "import {module}"'
+    
     @staticmethod
     def verify_python_import(module: str) -> Tuple[bool, str]:
         """验证 Python 模块可导入"""
-        command = f'python -c "import {module}"'
+        command = VerificationEngine.python_import_command(module)
         return VerificationEngine.verify_command_success(command)
+    
+    @staticmethod
+    def verify_batch(commands: List[Tuple[str, int]]) -> List[Tuple[bool, str]]:
+        """并发执行多条 (命令, 超时) 验证，结果按输入顺序返回"""
+        if len(commands) <= 1:
+            return [VerificationEngine.verify_command_success(cmd, timeout) for cmd, timeout in commands]
+        with ThreadPoolExecutor(max_workers=min(8, len(commands))) as executor:
+            return list(executor.map(VerificationEngine.verify_command_success, *zip(*commands)))
 
 
 class HealEngine:
@@ -114,40 +278,13 @@ class HealEngine:
     
     def diagnose_failure(self, error_message: str) -> List[str]:
         """诊断失败原因"""
-        suggestions = []
-        error_lower = error_message.lower()
-        
-        if "filenotfounderror" in error_lower or "文件不存在" in error_lower:
-            suggestions.extend([
-                "检查路径是否正确",
-                "检查工作目录",
-                "创建所需目录"
-            ])
-        
-        if "permissionerror" in error_lower or "权限" in error_lower:
-            suggestions.extend([
-                "检查文件权限",
-                "以管理员身份运行"
-            ])
-        
-        if "modulenotfounderror" in error_lower or "no module" in error_lower:
-            suggestions.extend([
-                "安装缺失依赖",
-                "检查虚拟环境"
-            ])
-        
-        if "timeout" in error_lower or "超时" in error_lower:
-            suggestions.extend([
-                "增加超时时间",
-                "检查网络连接",
-                "检查资源占用"
-            ])
-        
-        if "syntaxerror" in error_lower or "语法错误" in error_lower:
-            suggestions.extend([
-                "检查代码语法",
-                "运行 linter 检查"
-            ])
+        # 一次扫描找出命中的规则，建议按规则顺序合并
+        hits = set()
+        for match in _DIAGNOSIS_RE.finditer(error_message.lower()):
+            hits.add(_DIAGNOSIS_KEYWORDS[match.group(0)])
+            if len(hits) == len(DIAGNOSIS_RULES):
+                break
+        suggestions = [s for i in sorted(hits) for s in DIAGNOSIS_RULES[i][1]]
         
         return suggestions if suggestions else ["检查错误日志", "尝试手动执行"]
     
@@ -195,6 +332,16 @@ class HealEngine:
 class WorkflowManagerV2:
     """工作流管理器 V2 - 支持验证和自愈"""
     
+    # 变量占位符 {{name}}，类加载时编译一次
+    _VAR_RE = re.compile(r'\{\{(\w+)\}\}')
+    # 文档模板占位符：键名可以包含 \w 以外的字符（如 work-content）
+    _TEMPLATE_VAR_RE = re.compile(r'\{\{([^{}]+)\}\}')
+    # 断言表达式中可用的内置函数
+    _ASSERT_BUILTINS = {
+        name: getattr(builtins, name)
+        for name in ('len', 'int', 'float', 'str', 'bool', 'abs', 'min', 'max', 'any', 'all', 'round')
+    }
+    
     def __init__(self):
         self.workflow_dir = WORKFLOW_DIR
         self.template_dir = TEMPLATE_DIR
@@ -202,32 +349,27 @@ class WorkflowManagerV2:
         self.template_dir.mkdir(parents=True, exist_ok=True)
         self.verification = VerificationEngine()
         self.healer = HealEngine()
+        # 动作名 -> 处理函数，统一以 (step, params, variables) 调用
+        self._actions = {
+            'run_command': lambda step, params, variables: self._run_command_step(params),
+            'verify': self._verify_step,
+            'heal': self._heal_step,
+            'generate_document': lambda step, params, variables: self._generate_document_step(params),
+            'open_file': lambda step, params, variables: self._open_file_step(params),
+            'notify': lambda step, params, variables: self._notify_step(params),
+            'assert': lambda step, params, variables: self._assert_step(params, variables),
+        }
+        # 预先并发执行的命令类验证结果：id(step) -> (是否通过, 详情)
+        self._prefetched_verifies: Dict[int, Tuple[bool, str]] = {}
     
     def list_workflows(self) -> List[Dict]:
         """列出所有可用工作流"""
-        workflows = []
-        for yaml_file in self.workflow_dir.glob("*.yaml"):
-            try:
-                with open(yaml_file, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                    workflows.append({
-                        "name": data.get('name', yaml_file.stem),
-                        "description": data.get('description', ''),
-                        "file": str(yaml_file),
-                        "version": data.get('version', '1.0.0'),
-                        "steps_count": len(data.get('steps', [])),
-                        "has_verification": any(
-                            s.get('action') == 'verify' 
-                            for s in data.get('steps', [])
-                        )
-                    })
-            except Exception as e:
-                workflows.append({
-                    "name": yaml_file.stem,
-                    "error": str(e),
-                    "file": str(yaml_file)
-                })
-        return workflows
+        yaml_files = list(self.workflow_dir.glob("*.yaml"))
+        if not yaml_files:
+            return []
+        # 逐个文件读取解析互不依赖，用线程池并行；单个文件出错只影响自身条目
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1, len(yaml_files))) as executor:
+            return list(executor.map(_load_workflow_meta, yaml_files))
     
     def execute_workflow(self, workflow_name: str, context: Dict = None) -> Dict:
         """执行工作流（带验证和自愈）"""
@@ -236,28 +378,34 @@ class WorkflowManagerV2:
             return {"status": "error", "message": f"工作流 '{workflow_name}' 不存在"}
         
         try:
-            with open(workflow_file, 'r', encoding='utf-8') as f:
-                workflow = yaml.safe_load(f)
+            workflow = _load_yaml_cached(workflow_file)
         except Exception as e:
             return {"status": "error", "message": f"读取工作流失败: {str(e)}"}
         
         results = []
         variables = context or {}
-        variables['current_date'] = datetime.now().strftime('%Y-%m-%d')
-        variables['current_time'] = datetime.now().strftime('%H:%M:%S')
+        # 日期与时间取自同一时刻，避免跨午夜时两者不一致
+        now = datetime.now()
+        variables['current_date'] = now.strftime('%Y-%m-%d')
+        variables['current_time'] = now.strftime('%H:%M:%S')
         variables['workflow_name'] = workflow_name
         
         print(f"\n{'='*60}")
         print(f"🚀 执行工作流: {workflow.get('name', workflow_name)}")
         print(f"{'='*60}\n")
         
-        for i, step in enumerate(workflow.get('steps', [])):
+        steps = workflow.get('steps', [])
+        self._prefetched_verifies = {}
+        for i, step in enumerate(steps):
             step_id = step.get('id', i + 1)
             step_name = step.get('name', f'Step {i + 1}')
             
             print(f"\n📍 步骤 {step_id}: {step_name}")
             print("-" * 40)
             
+            if step.get('action') == 'verify' and id(step) not in self._prefetched_verifies:
+                self._prefetch_verifies(steps, i, variables)
+            
             step_result = self._execute_step(step, variables)
             step_result['step_id'] = step_id
             step_result['step_name'] = step_name
@@ -301,22 +449,10 @@ class WorkflowManagerV2:
         
         params = self._substitute_variables(params, variables)
         
-        if action == 'run_command':
-            return self._run_command_step(params)
-        elif action == 'verify':
-            return self._verify_step(step, params, variables)
-        elif action == 'heal':
-            return self._heal_step(step, params, variables)
-        elif action == 'generate_document':
-            return self._generate_document_step(params)
-        elif action == 'open_file':
-            return self._open_file_step(params)
-        elif action == 'notify':
-            return self._notify_step(params)
-        elif action == 'assert':
-            return self._assert_step(params)
-        else:
+        handler = self._actions.get(action)
+        if handler is None:
             return {"status": "error", "message": f"未知动作: {action}"}
+        return handler(step, params, variables)
     
     def _verify_step(self, step: Dict, params: Dict, variables: Dict = None) -> Dict:
         """执行验证步骤"""
@@ -333,32 +469,26 @@ class WorkflowManagerV2:
             path = self._substitute_variables(step.get('path', params.get('path', '')), variables)
             success, message = self.verification.verify_file_exists(path)
         
-        elif verify_type == 'command_success':
-            command = self._substitute_variables(params.get('command', step.get('command', '')), variables)
-            timeout = params.get('timeout', step.get('timeout', 30))
-            success, message = self.verification.verify_command_success(command, timeout)
+        elif verify_type in ('command_success', 'test_pass', 'python_import'):
+            prefetched = self._prefetched_verifies.pop(id(step), None)
+            if prefetched is None:
+                command, timeout = self._verify_command(step, params, variables)
+                prefetched = self.verification.verify_command_success(command, timeout)
+            success, message = prefetched
         
         elif verify_type == 'content_assert':
             file = self._substitute_variables(params.get('file', step.get('file', '')), variables)
             contains = params.get('contains', step.get('contains', []))
-            success, message = self.verification.verify_content_assert(file, contains)
+            exact_match = params.get('exact_match', step.get('exact_match', False))
+            success, message = self.verification.verify_content_assert(file, contains, exact_match)
         
         elif verify_type == 'diagnostics':
             success, message = self.verification.verify_diagnostics()
         
-        elif verify_type == 'test_pass':
-            command = self._substitute_variables(params.get('command', 'pytest'), variables)
-            timeout = params.get('timeout', 120)
-            success, message = self.verification.verify_test_pass(command, timeout)
-        
         elif verify_type == 'json_valid':
             path = self._substitute_variables(params.get('path', step.get('path', '')), variables)
             success, message = self.verification.verify_json_valid(path)
         
-        elif verify_type == 'python_import':
-            module = self._substitute_variables(params.get('module', step.get('module', '')), variables)
-            success, message = self.verification.verify_python_import(module)
-        
         else:
             return {"status": "error", "message": f"未知验证类型: {verify_type}"}
         
@@ -380,26 +510,70 @@ class WorkflowManagerV2:
             "details": message
         }
     
+    def _verify_command(self, step: Dict, params: Dict, variables: Dict) -> Optional[Tuple[str, int]]:
+        """命令类验证步骤要执行的 (命令, 超时)；其他验证类型返回 None"""
+        verify_type = step.get('type', params.get('type', 'command_success'))
+        if verify_type == 'command_success':
+            command = self._substitute_variables(params.get('command', step.get('command', '')), variables)
+            return command, params.get('timeout', step.get('timeout', 30))
+        if verify_type == 'test_pass':
+            command = self._substitute_variables(params.get('command', 'pytest'), variables)
+            return command, params.get('timeout', 120)
+        if verify_type == 'python_import':
+            module = self._substitute_variables(params.get('module', step.get('module', '')), variables)
+            return self.verification.python_import_command(module), 30
+        return None
+    
+    def _prefetch_verifies(self, steps: List[Dict], start: int, variables: Dict):
+        """从 start 开始连续的命令类验证步骤互不影响变量，预先并发执行它们的命令
+        
+        结果按步骤记录，步骤依次执行时直接取用，输出顺序不变。
+        验证命令可能有副作用，只有前一步配置了 on_failure: continue（失败也不会中止工作流）时
+        才把下一步并入批次，保证预先执行的命令在顺序执行时同样都会执行。
+        """
+        batch = []
+        for step in steps[start:]:
+            if step.get('action') != 'verify':
+                break
+            params = self._substitute_variables(step.get('params', {}), variables)
+            command = self._verify_command(step, params, variables)
+            if command is None:
+                break
+            batch.append((step, command))
+            if step.get('on_failure') != 'continue':
+                break
+        if len(batch) < 2:
+            return
+        
+        outcomes = self.verification.verify_batch([command for _, command in batch])
+        for (step, _), outcome in zip(batch, outcomes):
+            self._prefetched_verifies[id(step)] = outcome
+    
     def _heal_step(self, step: Dict, params: Dict, variables: Dict) -> Dict:
         """执行自愈步骤"""
         on_failure_step_id = step.get('on_failure')
         strategy = step.get('strategy', 'retry')
         max_attempts = step.get('max_attempts', 3)
         
-        self.healer = HealEngine(max_attempts)
+        # 只更新配置，保留已有的尝试次数与修复记录
+        self.healer.max_attempts = max_attempts
         
         return {
             "status": "success",
             "message": f"自愈配置已设置: strategy={strategy}, max_attempts={max_attempts}"
         }
     
-    def _assert_step(self, params: Dict) -> Dict:
-        """执行断言步骤"""
+    def _assert_step(self, params: Dict, variables: Dict = None) -> Dict:
+        """执行断言步骤（表达式中可引用工作流变量及 params.vars）"""
         condition = params.get('condition')
         message = params.get('message', '断言失败')
         
         try:
-            result = eval(condition)
+            # 同一条件只编译一次；不暴露模块全局和完整的内置函数
+            code = _compile_assert(condition)
+            names = dict(variables or {})
+            names.update(params.get('vars') or {})
+            result = eval(code, {'__builtins__': self._ASSERT_BUILTINS}, names)
             if result:
                 return {"status": "success", "message": f"断言通过: {condition}"}
             return {"status": "error", "message": message}
@@ -408,16 +582,35 @@ class WorkflowManagerV2:
     
     def _substitute_variables(self, obj: Any, variables: Dict) -> Any:
         """替换变量占位符"""
+        # 没有变量时占位符都会原样保留，无需遍历
+        if not variables:
+            return obj
         if isinstance(obj, str):
-            pattern = r'\{\{(\w+)\}\}'
+            if '{{' not in obj:
+                return obj
             def replace_var(match):
                 var_name = match.group(1)
                 return str(variables.get(var_name, match.group(0)))
-            return re.sub(pattern, replace_var, obj)
+            return self._VAR_RE.sub(replace_var, obj)
         elif isinstance(obj, dict):
-            return {k: self._substitute_variables(v, variables) for k, v in obj.items()}
+            # 只复制确实发生替换的容器，其余子结构原样返回（可能来自 YAML 缓存，调用方不应修改）
+            new_obj = None
+            for k, v in obj.items():
+                new_v = self._substitute_variables(v, variables)
+                if new_v is not v:
+                    if new_obj is None:
+                        new_obj = dict(obj)
+                    new_obj[k] = new_v
+            return obj if new_obj is None else new_obj
         elif isinstance(obj, list):
-            return [self._substitute_variables(item, variables) for item in obj]
+            new_obj = None
+            for i, item in enumerate(obj):
+                new_item = self._substitute_variables(item, variables)
+                if new_item is not item:
+                    if new_obj is None:
+                        new_obj = list(obj)
+                    new_obj[i] = new_item
+            return obj if new_obj is None else new_obj
         return obj
     
     def _run_command_step(self, params: Dict) -> Dict:
@@ -429,9 +622,8 @@ class WorkflowManagerV2:
         print(f"⚡ 执行命令: {command[:100]}...")
         
         try:
-            result = subprocess.run(
+            result = _run_shell_command(
                 command,
-                shell=True,
                 capture_output=True,
                 text=True,
                 timeout=params.get('timeout', 30),
@@ -479,8 +671,15 @@ class WorkflowManagerV2:
         else:
             content = params.get('content', '')
         
-        for key, value in variables.items():
-            content = content.replace(f'{{{{{key}}}}}', str(value))
+        # 单次扫描替换全部占位符，按占位符名查表
+        if variables and '{{' in content:
+            values = {str(key): value for key, value in variables.items()}
+            
+            def render_var(match):
+                name = match.group(1)
+                return str(values[name]) if name in values else match.group(0)
+            
+            content = self._TEMPLATE_VAR_RE.sub(render_var, content)
         
         output_file.write_text(content, encoding='utf-8')
         
@@ -503,7 +702,23 @@ class WorkflowManagerV2:
             return {"status": "error", "message": f"文件不存在: {file_path}"}
         
         try:
-            os.startfile(str(file_path))
+            if _OPENER is None:
+                os.startfile(str(file_path))
+            else:
+                # open / xdg-open 通常把文件交给桌面环境后立即退出，短暂等待以获取退出码
+                proc = subprocess.Popen([*_OPENER, str(file_path)], stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                        close_fds=True, start_new_session=True)
+                try:
+                    _, stderr = proc.communicate(timeout=_OPENER_WAIT)
+                except subprocess.TimeoutExpired:
+                    # 打开程序仍在前台运行（如直接启动了编辑器），交给后台线程回收，避免僵尸进程
+                    threading.Thread(target=proc.communicate, daemon=True).start()
+                else:
+                    if proc.returncode != 0:
+                        detail = stderr.decode(errors='replace').strip()
+                        return {"status": "error",
+                                "message": f"打开失败 (退出码 {proc.returncode}): {detail or file_path}"}
             return {"status": "success", "message": f"已打开: {file_path}"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -517,12 +732,19 @@ class WorkflowManagerV2:
     def validate_workflow(self, workflow_name: str) -> Dict:
         """验证工作流配置"""
         workflow_file = self.workflow_dir / f"{workflow_name}.yaml"
-        if not workflow_file.exists():
+        key = str(workflow_file)
+        try:
+            st = os.stat(key)
+        except OSError:
             return {"valid": False, "error": f"工作流 '{workflow_name}' 不存在"}
         
+        # 校验结果只取决于文件内容，文件未变时直接复用
+        entry = _VALIDATE_CACHE.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return _copy_validation(entry[2])
+        
         try:
-            with open(workflow_file, 'r', encoding='utf-8') as f:
-                workflow = yaml.safe_load(f)
+            workflow = _load_yaml_cached(workflow_file, st)
         except Exception as e:
             return {"valid": False, "error": f"YAML 解析失败: {str(e)}"}
         
@@ -548,17 +770,20 @@ class WorkflowManagerV2:
                 if not verify_type:
                     issues.append(f"步骤 {i+1}: 验证步骤缺少 type")
         
-        return {
+        result = {
             "valid": len(issues) == 0,
-            "issues": issues,
-            "warnings": warnings,
+            "issues": tuple(issues),
+            "warnings": tuple(warnings),
             "has_verification": has_verify,
             "steps_count": len(steps)
         }
+        _VALIDATE_CACHE[key] = (st.st_mtime_ns, st.st_size, result)
+        return _copy_validation(result)
 
 
 def main():
     import argparse
+    import base64
     
     parser = argparse.ArgumentParser(
         description='Trae Workflow Manager V2 - 自验证闭环工作流系统',
@@ -579,6 +804,7 @@ def main():
     run_parser = subparsers.add_parser('run', help='执行工作流')
     run_parser.add_argument('workflow', help='工作流名称')
     run_parser.add_argument('--var', action='append', help='变量 (key=value)')
+    run_parser.add_argument('--context-b64', help='base64 编码的 JSON 变量对象，值可以是任意 JSON 类型（--var 优先）')
     
     validate_parser = subparsers.add_parser('validate', help='验证工作流配置')
     validate_parser.add_argument('workflow', help='工作流名称')
@@ -597,6 +823,8 @@ def main():
     
     elif args.command == 'run':
         context = {}
+        if args.context_b64:
+            context.update(json.loads(base64.b64decode(args.context_b64)))
         if args.var:
             for var in args.var:
                 if '=' in var: